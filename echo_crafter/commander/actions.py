@@ -0,0 +1,143 @@
+"""Execute the Emacs and keyboard actions of the controllers."""
+
+import os
+import socket
+import subprocess
+from pathlib import Path
+from typing import List, NamedTuple, Sequence
+
+from echo_crafter.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def get_emacs_socket() -> Path:
+    """Get the path to the socket of the Emacs server."""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR") or f"/run/user/{os.getuid()}"
+    return Path(os.getenv("EMACS_SOCKET_NAME") or Path(runtime_dir) / "emacs" / "server")
+
+
+def quote_argument(argument: str) -> str:
+    """Quote an argument of the Emacs server protocol the way emacsclient does."""
+    quoted = argument.replace('&', '&&').replace(' ', '&_').replace('\n', '&n')
+    return '&' + quoted if quoted.startswith('-') else quoted
+
+
+def unquote_argument(argument: str) -> str:
+    """Unquote an argument of the Emacs server protocol."""
+    replacements = {'&': '&', '-': '-', 'n': '\n', '_': ' '}
+    result, chars = [], iter(argument)
+    for char in chars:
+        result.append(replacements.get(next(chars, ''), '') if char == '&' else char)
+    return ''.join(result)
+
+
+class ActionResult(NamedTuple):
+    """The outcome of an action."""
+    ok: bool
+    output: str
+
+
+class ActionExecutor:
+    """Run the actions of the controllers without spawning a process per action where possible.
+
+    Emacs expressions are sent straight to the Emacs server socket, speaking the emacsclient
+    protocol; several expressions are evaluated in a single round trip. The server closes the
+    connection once it has answered, but connecting to a local socket costs far less than
+    starting emacsclient, which is only run when the socket is not available.
+
+    Keyboard and window actions are chained into a single xdotool invocation per batch, e.g.
+    searching a window and activating it, or typing a command along with the Enter key. xdotool has no persistent mode which would execute
+    commands as they arrive on its input, so one process per batch is the floor here.
+    """
+
+    def __init__(self, emacs_socket=None, timeout: float = 5.0):
+        """Initialize the executor.
+
+        Args:
+            emacs_socket: The path to the socket of the Emacs server.
+            timeout: The number of seconds to wait for an action to complete.
+        """
+        self.emacs_socket = Path(emacs_socket) if emacs_socket is not None else get_emacs_socket()
+        self.timeout = timeout
+
+    def _connect_emacs(self) -> socket.socket:
+        """Connect to the Emacs server socket."""
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.settimeout(self.timeout)
+            conn.connect(str(self.emacs_socket))
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _emacs_socket_eval(self, conn: socket.socket, expression: str) -> ActionResult:
+        """Evaluate an expression over a connection to the Emacs server."""
+        with conn:
+            conn.sendall(f"-eval {quote_argument(expression)}\n".encode('utf-8'))
+            chunks = []
+            while chunk := conn.recv(4096):
+                chunks.append(chunk)
+
+        ok, output = True, []
+        for line in b''.join(chunks).decode('utf-8').splitlines():
+            command, _, argument = line.partition(' ')
+            if command in ('-print', '-print-nonl'):
+                output.append(unquote_argument(argument))
+            elif command == '-error':
+                ok = False
+                output.append(unquote_argument(argument))
+        return ActionResult(ok, ''.join(output))
+
+    def emacs(self, *expressions: str) -> ActionResult:
+        """Evaluate the given Emacs Lisp expressions in order and return the value of the last one.
+
+        emacsclient is only run when no Emacs server listens on the socket. Once the expression
+        was sent, it is never sent again, since it may have run already, e.g. when the server
+        fails to answer in time.
+        """
+        expression = expressions[0] if len(expressions) == 1 else f"(progn {' '.join(expressions)})"
+        try:
+            conn = self._connect_emacs()
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            logger.info("Falling back to emacsclient: %s", e)
+            process = subprocess.run(["emacsclient", "-s", str(self.emacs_socket), "-e", expression],
+                                     capture_output=True, text=True, timeout=self.timeout)
+            result = ActionResult(process.returncode == 0, (process.stdout or process.stderr).strip())
+        except OSError as e:
+            result = ActionResult(False, f"Cannot connect to the Emacs server: {e}")
+        else:
+            try:
+                result = self._emacs_socket_eval(conn, expression)
+            except OSError as e:
+                result = ActionResult(False, f"No answer from the Emacs server: {e}")
+        if not result.ok:
+            logger.error("Emacs action failed: %s", result.output)
+        return result
+
+    def xdotool(self, *commands: Sequence[str]) -> ActionResult:
+        """Run the given xdotool commands, e.g. `['search', ...]` then `['windowactivate']`, in one process."""
+        arguments: List[str] = ["xdotool"]
+        for command in commands:
+            arguments.extend(command)
+        process = subprocess.run(arguments, capture_output=True, text=True, timeout=self.timeout)
+        result = ActionResult(process.returncode == 0, (process.stdout or process.stderr).strip())
+        if not result.ok:
+            logger.error("Keyboard action failed: %s", result.output)
+        return result
+
+    def type_text(self, text: str, *, submit: bool = False) -> ActionResult:
+        """Type some text in the active window, then press Enter if `submit` is set.
+
+        `xdotool type` takes all of its remaining arguments as text, so Enter is typed as a
+        trailing newline rather than chained as a separate `key` command.
+        """
+        return self.xdotool(["type", "--clearmodifiers", "--delay", "0", text + "\n" if submit else text])
+
+    def activate_window(self, window_class: str) -> ActionResult:
+        """Focus a visible window of the given class."""
+        return self.xdotool(["search", "--onlyvisible", "--class", window_class, "windowactivate"])
+
+
+actions = ActionExecutor()
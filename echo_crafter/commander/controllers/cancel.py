@@ -2,5 +2,10 @@
 
 """Do nothing."""
 
+
+def main():
+    """Do nothing."""
+
+
 if __name__ == "__main__":
-    pass
+    main()
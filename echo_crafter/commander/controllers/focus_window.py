@@ -4,28 +4,13 @@ import argparse
 import subprocess
 import re
 from typing import Optional
-
-
-WINDOW_NAMES_ALIAS = {
-    "browser": "chrome",
-    "chrome": "chrome",
-    "emacs": "emacs",
-    "fire_fox": "firefox",
-    "google_search": "chrome",
-    "internet": "chrome",
-    "kitty": "kitty",
-    "shell": "kitty",
-    "sound": "pavucontrol",
-    "sound_control": "pavucontrol",
-    "web": "chrome",
-}
+from echo_crafter.commander.slots import slot_index
+from echo_crafter.commander.actions import actions
 
 
 def focus_window_by_name(window_name: str):
     """Focus the window with the given name."""
-    subprocess.Popen(
-        ['xdotool', 'search', '--onlyvisible', '--class', window_name, 'windowactivate']
-    )
+    actions.activate_window(window_name)
 
 
 def focus_window_by_number(window_number: str):
@@ -36,6 +21,22 @@ def focus_window_by_number(window_number: str):
         subprocess.Popen(['stumpish', 'select-window-by-number', number])
 
 
+def execute(*, window_number: Optional[str] = None, window_name: Optional[str] = None):
+    """Focus a window by its number or by the alias of its name."""
+    if window_number:
+        focus_window_by_number(window_number=window_number)
+    elif window_name:
+        window_class = window_class_of(window_name)
+        if window_class:
+            focus_window_by_name(window_name=window_class)
+
+
+def window_class_of(window_name: str) -> Optional[str]:
+    """Return the class of the window referred to by a spoken window name."""
+    program = slot_index.resolve('windowName', window_name)
+    return slot_index.resolve('windowClass', program) if program is not None else None
+
+
 def main():
     parser = argparse.ArgumentParser(description='Focus a window by its name or number.')
     group = parser.add_mutually_exclusive_group(required=True)
@@ -44,13 +45,7 @@ def main():
 
     args = parser.parse_args()
 
-    # Call the focus_window function with the parsed arguments
-    if args.window_number:
-        focus_window_by_number(window_number=args.window_number)
-    elif args.window_name:
-        name = WINDOW_NAMES_ALIAS.get(args.window_name, '')
-        if name:
-            focus_window_by_name(window_name=name)
+    execute(window_number=args.window_number, window_name=args.window_name)
 
 
 if __name__ == '__main__':
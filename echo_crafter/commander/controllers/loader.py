@@ -1,12 +1,19 @@
 """Load controllers from the given directory."""
 
 import os
+import inspect
 import subprocess
 from pathlib import Path
+from importlib.util import module_from_spec, spec_from_file_location
+from concurrent.futures import Future, ThreadPoolExecutor
 from echo_crafter.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+ENTRY_POINTS = ('execute', 'main')
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="controller")
+
 
 def make_controller(script: Path):
     """Make a lambda which will execute the given script.
@@ -23,11 +30,73 @@ def make_controller(script: Path):
     return controller
 
 
-def load(dir_path: str):
+def _log_exception(future: Future):
+    """Log the exception raised by a controller, if any."""
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Controller failed: %s", exc, exc_info=exc)
+
+
+def make_module_controller(script: Path, *, capture=None):
+    """Import the given Python script once and make a function calling its entry point.
+
+    The entry point is the first of the module's `execute` or `main` functions. It is called
+    with the slots as keyword arguments on a long-lived worker thread, so that the caller
+    is not blocked, just like with a subprocess. When the entry point does not accept the
+    given arguments, the script is executed in a subprocess instead.
+
+    When a shared `capture` is given and the entry point takes an `audio_source` argument,
+    it is passed a subscription to the capture, taken as the controller is called so that
+    no frame is missed, and dropped once the entry point returns.
+
+    Raises:
+        ImportError: If the module cannot be imported or has no entry point.
+    """
+    spec = spec_from_file_location(f"echo_crafter_controller_{script.stem}", script)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot import controller {script}")
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    entry_point = next((getattr(module, name) for name in ENTRY_POINTS
+                        if callable(getattr(module, name, None))), None)
+    if entry_point is None:
+        raise ImportError(f"Controller {script} has no entry point among {ENTRY_POINTS}")
+    signature = inspect.signature(entry_point)
+    fallback = make_controller(script)
+    takes_audio_source = 'audio_source' in signature.parameters
+
+    def run_subscribed(audio_source, **kwargs):
+        try:
+            return entry_point(audio_source=audio_source, **kwargs)
+        finally:
+            capture.unsubscribe(audio_source)
+
+    def controller(**kwargs):
+        try:
+            signature.bind(**kwargs)
+        except TypeError:
+            logger.warning("Controller %s does not accept %s, executing it instead", script.stem, kwargs)
+            return fallback(**kwargs)
+        if capture is not None and takes_audio_source:
+            future = _executor.submit(run_subscribed, capture.subscribe(), **kwargs)
+        else:
+            future = _executor.submit(entry_point, **kwargs)
+        future.add_done_callback(_log_exception)
+        return future
+    return controller
+
+
+def load(dir_path: str, *, in_process: bool = True, capture=None):
     """Load all the controllers from the given directory.
 
     Return a dictionary mapping the controller name to
     the controller function.
+
+    If `in_process` is true, the Python controllers are imported and called
+    in the current process, and only the other executables are executed in
+    subprocesses. The controllers imported in-process read their audio from
+    `capture`, a running `AudioCapture`, if one is given.
     """
     controllers = {}
 
@@ -36,7 +105,12 @@ def load(dir_path: str):
             Path(dir_path).glob('*')
     ):
         key = executable.stem
-        value = make_controller(executable)
-        controllers[key] = value
+        value = None
+        if in_process and executable.suffix == '.py':
+            try:
+                value = make_module_controller(executable, capture=capture)
+            except Exception as e:
+                logger.warning("Failed to import controller %s, it will be executed instead: %s", key, e)
+        controllers[key] = value or make_controller(executable)
 
     return controllers
@@ -4,8 +4,9 @@
 
 import subprocess
 from typing import Optional
-from utils import current_active_window, project_directory
-from echo_crafter.commander import dictionary as cmd_dict
+from echo_crafter.commander.controllers.utils import current_active_window, project_directory
+from echo_crafter.commander.slots import slot_index
+from echo_crafter.commander.actions import actions
 
 
 def navigate_website(website_name: str) -> None:
@@ -18,9 +19,11 @@ def navigate_website(website_name: str) -> None:
                     "chromium" if "chromium" in active_window_name else
                     None)
 
-    if browser_name is not None:
+    url = slot_index.resolve("websiteName", website_name)
+    if url is None:
+        print(f"Unknown website: {website_name}")
+    elif browser_name is not None:
         print(f"Navigating to {website_name} in {browser_name}")
-        url = cmd_dict.slots_dictionary["websiteName"].get(website_name)
         with subprocess.Popen([browser_name, url]):
             pass
     else:
@@ -34,17 +37,7 @@ def navigate_directory_shell(directory_name: str) -> None:
     is that of a shell.
     """
 
-    content_string = f"cd {directory_name}"
-    with subprocess.Popen(["xdotool",
-                           "type",
-                           "--clearmodifiers",
-                           "--delay",
-                           "0",
-                           content_string]) as proc:
-        proc.wait()
-    with subprocess.Popen(["xdotool",
-                           "key",
-                           "KP_Enter"]):
+    if actions.type_text(f"cd {directory_name}", submit=True).ok:
         print(f"Changed directory to {directory_name}")
 
 
@@ -56,13 +49,8 @@ def navigate_directory_emacs(directory_name: str) -> None:
     DIRECTORY_NAME is not a directory.
     """
 
-    emacs_socket = "/run/user/1000/emacs/server"
-    with subprocess.Popen(["emacsclient",
-                           "-s",
-                           emacs_socket,
-                           "-e",
-                           f'(find-file-other-window "{directory_name}")']):
-        print(f"Opening {directory_name} in Emacs")
+    if actions.emacs(f'(find-file-other-window "{directory_name}")').ok:
+        print(f"Opened {directory_name} in Emacs")
 
 
 def navigate_directory(directory_name: str) -> None:
@@ -73,23 +61,10 @@ def navigate_directory(directory_name: str) -> None:
     active_window_name = current_active_window()
 
     if "Emacs" in active_window_name:
-        print(f'Running emacsclient -e (find-file-other-window "{directory_name}")')
         navigate_directory_emacs(directory_name)
 
     elif "kitty" in active_window_name:
-        content = f"cd {directory_name}"
-        print(f"Running 'xdotool type --clearmodifers --delay 0 {content} && xdotool key KP_Enter'")
-        with subprocess.Popen(["xdotool",
-                               "type",
-                               "--clearmodifiers",
-                               "--delay",
-                               "0",
-                               content]) as proc:
-            proc.wait()
-        with subprocess.Popen(["xdotool",
-                               "key",
-                               "KP_Enter"]):
-            pass
+        navigate_directory_shell(directory_name)
 
 
 def main(*,
@@ -100,18 +75,15 @@ def main(*,
 
     print(f"Executing `navigate` intent with locals {locals()}")
 
-    directory_name = (directory_name if directory_name
-                      else project_directory(project_name) if project_name
-                      else None)
-
     if directory_name:
+        directory_name = slot_index.resolve("directoryName", directory_name) or directory_name
         print(f"Directory name: {directory_name}")
         navigate_directory(directory_name)
 
     elif project_name:
+        project_name = slot_index.resolve("projectName", project_name) or project_name
         print(f"Project name: {project_name}")
-        directory_name = project_directory(project_name)
-        navigate_directory(directory_name)
+        navigate_directory(project_directory(project_name))
 
     elif website_name:
         print(f"Website name: {website_name}")
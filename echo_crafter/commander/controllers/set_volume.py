@@ -2,45 +2,49 @@
 
 """Set the volume to the given value."""
 
-import subprocess
+import re
 from pathlib import Path
+from echo_crafter.commander.volume import DEFAULT_STEP, volume_control
+
+
+def report_volume(message: str, applied) -> None:
+    """Print the applied volume, when it was read back."""
+    print(f"{message} to {applied:.0%}" if applied is not None else message)
 
 
 def main(*,
          volume_setting=None,
          percentage=None) -> None:
-    """Set the volume to the given value."""
+    """Set the volume to the given value.
+
+    The percentage is either absolute, e.g. '40%', in which case the volume ramps to it
+    when the sound server connection allows, or relative, e.g. '+10%'.
+    """
     if volume_setting is not None:
-        mute_cmd_id = None
         match volume_setting:
             case "mute":
                 print("muting volume")
-                mute_cmd_id = '1'
+                volume_control.mute(True)
             case "unmute":
                 print("Unmuting volume")
-                mute_cmd_id = '0'
+                volume_control.mute(False)
+            case "up":
+                report_volume("Volume up", volume_control.step(DEFAULT_STEP))
+            case "down":
+                report_volume("Volume down", volume_control.step(-DEFAULT_STEP))
             case _:
-                pass
-        if mute_cmd_id is None:
-            raise ValueError("Invalid volume setting")
-        with subprocess.Popen(
-                ["pactl", "set-sink-mute", "@DEFAULT_SINK@", mute_cmd_id],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-        ) as proc:
-            stdout, stderr = proc.communicate()
-            if stderr.decode("utf-8"):
-                raise RuntimeError(f"Error setting volume: {stderr.decode('utf-8')}")
+                raise ValueError("Invalid volume setting")
     elif percentage is not None:
+        m = re.match(r'\s*([+-]?)\s*(\d+)', str(percentage))
+        if m is None:
+            raise ValueError(f"Invalid percentage: {percentage}")
+        sign, value = m.group(1), int(m.group(2)) / 100
         print(f"Setting volume to {percentage}")
-        with subprocess.Popen(
-            ["pactl", "set-sink-volume", "@DEFAULT_SINK@", percentage],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        ) as proc:
-            stdout, stderr = proc.communicate()
-            if stderr.decode("utf-8"):
-                raise RuntimeError(f"Error setting volume: {stderr.decode('utf-8')}")
+        if sign:
+            applied = volume_control.step(value if sign == '+' else -value)
+        else:
+            applied = volume_control.ramp(value)
+        report_volume("Volume set", applied)
     else:
         msg = "Invalid parameters for intent 'setVolume': either `percentage` or `volumeSetting` must be provided"
         raise ValueError(msg)
@@ -54,8 +58,8 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Set the volume to the given value.")
     group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument("--volume_setting", choices=["mute", "unmute"], help="Set the volume to mute or unmute.")
-    group.add_argument("--percentage", type=str, help="Set the volume to the specified percentage.")
+    group.add_argument("--volume_setting", choices=["mute", "unmute", "up", "down"], help="Mute, unmute, or step the volume up or down.")
+    group.add_argument("--percentage", type=str, help="Set the volume to the specified percentage, or change it by a signed one.")
 
     args = parser.parse_args()
 
@@ -3,61 +3,68 @@
 import time
 import subprocess
 from typing import Callable, Optional
-from threading import Thread
+from contextlib import ExitStack
 from echo_crafter.config import Config
 from echo_crafter.logger import setup_logger
-from echo_crafter.speech_processor.resources import (
-    create_cheetah,
-    create_recorder,
-)
+from echo_crafter.commander.actions import actions
+from echo_crafter.speech_processor.resources import engine_pool
 
 logger = setup_logger(__name__)
 
 
 def run(callback_partial: Optional[Callable[..., None]] = None,
         callback_final: Optional[Callable[..., None]] = None,
-        timeout_seconds=6.0):
-    """Upon detection of a wake word, transcribe speech until endpoint is detected."""
+        timeout_seconds=6.0,
+        audio_source=None):
+    """Upon detection of a wake word, transcribe speech until endpoint is detected.
 
-    with create_cheetah(model_file=Config['CHEETAH_MODEL_FILE']) as transcriber, \
-         create_recorder() as recorder:
-        recorder.start()
-        start_time = time.time()
+    The frames are read from `audio_source`, a subscription to a shared `AudioCapture`,
+    if it is given, and from a recorder leased from the engine pool otherwise. The
+    transcription is finalized at the endpoint, after `timeout_seconds`, or as soon as
+    no frame arrives before that deadline, e.g. because the capture stopped.
+    """
+
+    with ExitStack() as stack:
+        transcriber = stack.enter_context(engine_pool.lease('cheetah', model_file=Config['CHEETAH_MODEL_FILE']))
+        deadline = time.time() + timeout_seconds
+        if audio_source is None:
+            recorder = stack.enter_context(engine_pool.lease('recorder'))
+            recorder.start()
+            read_frame, is_recording = recorder.read, lambda: recorder.is_recording
+        else:
+            def read_frame():
+                return audio_source.get(timeout=max(deadline - time.time(), 0.0))
+            is_recording = lambda: True
         partial_transcripts = []
-        while recorder.is_recording:
-            partial_transcript, is_endpoint = transcriber.process(recorder.read())
+        while is_recording():
+            try:
+                partial_transcript, is_endpoint = transcriber.process(read_frame())
+            except TimeoutError:
+                logger.warning("No audio frame received before the timeout, finalizing the transcription")
+                partial_transcript, is_endpoint = '', True
             partial_transcripts.append(partial_transcript)
             if callback_partial is not None:
                 callback_partial(partial_transcript)
-                if is_endpoint or time.time() - start_time > timeout_seconds:
-                    partial_transcript = transcriber.flush()
-                    partial_transcripts.append(partial_transcript)
-                    if callback_partial is not None:
-                        callback_partial(partial_transcript)
-                    if callback_final is not None:
-                        callback_final(''.join(partial_transcripts))
-                    break
+            if is_endpoint or time.time() > deadline:
+                partial_transcript = transcriber.flush()
+                partial_transcripts.append(partial_transcript)
+                if callback_partial is not None:
+                    callback_partial(partial_transcript)
+                if callback_final is not None:
+                    callback_final(''.join(partial_transcripts))
+                break
 
 
-def main():
-    """Run the speech processor in a separate thread."""
+def main(audio_source=None):
+    """Run the speech processor in the current thread, reading from `audio_source` if given."""
     callback_partial = send_to_keyboard
     callback_final = send_to_clipboard
-    Thread(target=run, args=(callback_partial, callback_final,)).start()
-    #run(callback_partial, callback_final).start()
+    run(callback_partial, callback_final, audio_source=audio_source)
 
 
 def send_to_keyboard(content: str) -> None:
     """Send the content to the keyboard."""
-    with subprocess.Popen([
-        'xdotool',
-        'type',
-        '--clearmodifiers',
-        '--delay',
-        '0',
-        content
-    ]) as proc:
-        proc.communicate()
+    actions.type_text(content)
 
 
 def send_to_clipboard(content: str) -> None:
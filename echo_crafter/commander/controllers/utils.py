@@ -2,14 +2,15 @@
 
 """Utility functions for defining command handlers."""
 
-from subprocess import check_output
+from echo_crafter.commander.window_tracker import window_tracker
 
 
 def current_active_window():
-    """Return the class name of the currently active window."""
-    return check_output(
-        ["xdotool", "getactivewindow", "getwindowclassname"]
-    ).decode("utf-8")
+    """Return the class name of the currently active window.
+
+    It is kept up to date in memory by the window tracker, with xdotool as a fallback.
+    """
+    return window_tracker.active_window()
 
 
 def project_directory(project):
@@ -61,5 +61,13 @@ slots_dictionary = {
         "browser": "google-chrome-stable",
         "emacs": "emacs",
         "shell": "kitty"
+    },
+    # The X11 window class of each program a `windowName` resolves to.
+    "windowClass": {
+        "google-chrome-stable": "Google-chrome",
+        "firefox": "Firefox",
+        "pavucontrol": "pavucontrol",
+        "kitty": "kitty",
+        "emacs": "Emacs"
     }
 }
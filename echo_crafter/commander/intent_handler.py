@@ -3,7 +3,6 @@
 from typing import NamedTuple
 from echo_crafter.config import Config
 from echo_crafter.logger import setup_logger
-from echo_crafter.utils import play_sound
 from echo_crafter.commander.controllers import loader
 from echo_crafter.commander.utils import format_intent, format_slots
 from echo_crafter.commander import dictionary
@@ -19,15 +18,16 @@ class IntentHandler:
         finished: bool
         extra_arg_required: bool
 
-    def __init__(self, *, controllers_dir: str):
+    def __init__(self, *, controllers_dir: str, capture=None):
         """Create the intent handler.
 
         Args:
             context_file: The path to the context file.
             CONTROLLERS_DIR: The path to the directory containing the controllers.
+            capture: A running `AudioCapture` the controllers read their audio from, if any.
         """
         self.context = None
-        self.controllers = loader.load(controllers_dir)
+        self.controllers = loader.load(controllers_dir, capture=capture)
 
     def __call__(self, *, intent: str, slots: dict) -> None:
         """Handle the intent and execute the command.
@@ -42,13 +42,12 @@ class IntentHandler:
 
         if controller:
             controller(**params)
-            play_sound(Config['INTENT_SUCCESS_WAV'])
         else:
             logger.error("No controller found to handle intent: %s", intent)
             raise ValueError(f"Controller for intent {intent} not found")
 
 
-def create(*, controllers_dir: str = Config['CONTROLLERS_DIR']):
+def create(*, controllers_dir: str = Config['CONTROLLERS_DIR'], capture=None):
     """Create an instance of the intent handler."""
-    return IntentHandler(controllers_dir=controllers_dir)
+    return IntentHandler(controllers_dir=controllers_dir, capture=capture)
     
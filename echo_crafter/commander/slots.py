@@ -0,0 +1,110 @@
+"""Resolve the transcribed values of slots to the values the controllers act upon."""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from echo_crafter.commander.dictionary import slots_dictionary
+
+_NON_ALPHANUMERIC = re.compile(r'[^0-9a-z]+')
+_CAMEL_BOUNDARY = re.compile(r'(?<!^)(?=[A-Z][a-z])')
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Reduce a phrase to its lowercase letters and digits, so that e.g. 'fire fox', 'fire_fox' and 'Firefox' coincide."""
+    return _NON_ALPHANUMERIC.sub('', phrase.lower())
+
+
+@lru_cache(maxsize=1024)
+def snake_case(name: str) -> str:
+    """Convert a camelCase name, e.g. the name of a slot, to snake_case."""
+    return _CAMEL_BOUNDARY.sub('_', name).lower()
+
+
+class _TrieNode:
+    __slots__ = ('children', 'value')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.value: Optional[str] = None
+
+
+class SlotTable:
+    """The values of one slot, indexed by their normalized phrases.
+
+    Exact lookups of a normalized phrase are a dictionary access. Lookups allowing a few edits
+    walk a trie of the normalized phrases while updating one row of the edit distance matrix
+    per node, so that only the branches within the allowed distance are explored.
+    """
+
+    def __init__(self, entries: Dict[str, str]):
+        """Index the given `{phrase: value}` entries. Every value is also a phrase resolving to itself."""
+        self.exact: Dict[str, str] = {}
+        self.root = _TrieNode()
+        for phrase, value in [*entries.items(), *((value, value) for value in entries.values())]:
+            key = normalize_phrase(phrase)
+            if not key or key in self.exact:
+                continue
+            self.exact[key] = value
+            node = self.root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+            node.value = value
+
+    def resolve(self, phrase: str, max_edits: int = 0) -> Optional[str]:
+        """Return the value of the given phrase, or None if no phrase or several ones are within `max_edits` edits of it."""
+        key = normalize_phrase(phrase)
+        if key in self.exact:
+            return self.exact[key]
+        if max_edits <= 0:
+            return None
+
+        matches: List[Tuple[int, str]] = []
+        first_row = list(range(len(key) + 1))
+        for char, child in self.root.children.items():
+            self._search(child, char, key, first_row, max_edits, matches)
+        if not matches:
+            return None
+        best = min(distance for distance, _ in matches)
+        values = {value for distance, value in matches if distance == best}
+        return values.pop() if len(values) == 1 else None
+
+    def _search(self, node: _TrieNode, char: str, key: str, previous_row: List[int],
+                max_edits: int, matches: List[Tuple[int, str]]) -> None:
+        """Extend the edit distance computation to the given trie node and its descendants."""
+        row = [previous_row[0] + 1]
+        for i in range(1, len(key) + 1):
+            row.append(min(row[i - 1] + 1,
+                           previous_row[i] + 1,
+                           previous_row[i - 1] + (key[i - 1] != char)))
+        if node.value is not None and row[-1] <= max_edits:
+            matches.append((row[-1], node.value))
+        if min(row) <= max_edits:
+            for next_char, child in node.children.items():
+                self._search(child, next_char, key, row, max_edits, matches)
+
+
+class SlotIndex:
+    """The tables of all the slots of the commander's dictionary, built once and shared by the controllers."""
+
+    # Short phrases are only matched exactly, since a single edit changes too much of them.
+    MIN_FUZZY_LENGTH = 5
+
+    def __init__(self, dictionary: Dict[str, Dict[str, str]]):
+        """Build the tables of the given `{slot: {phrase: value}}` dictionary."""
+        self.tables = {slot: SlotTable(entries) for slot, entries in dictionary.items()}
+
+    def resolve(self, slot: str, phrase: str) -> Optional[str]:
+        """Return the value of the given phrase of a slot, tolerating one edit in long enough phrases."""
+        table = self.tables.get(slot)
+        if table is None:
+            return None
+        max_edits = 1 if len(normalize_phrase(phrase)) >= self.MIN_FUZZY_LENGTH else 0
+        return table.resolve(phrase, max_edits)
+
+    def translate(self, slots: dict) -> dict:
+        """Replace the values of the given slots by their resolved values, leaving unknown ones as they are."""
+        return {slot: self.resolve(slot, phrase) or phrase for slot, phrase in slots.items()}
+
+
+slot_index = SlotIndex(slots_dictionary)
@@ -2,7 +2,7 @@
 
 import re
 from typing import List
-from echo_crafter.commander.dictionary import slots_dictionary
+from echo_crafter.commander.slots import slot_index, snake_case
 
 def format_intent(intent: str) -> str:
     """Format the intent string to be used as a key."""
@@ -11,12 +11,12 @@ def format_intent(intent: str) -> str:
 
 def format_slots(slots: dict) -> dict:
     """Convert the slots dictionary to command-line arguments."""
-    return {camel_to_snake(k): camel_to_snake(v) for k, v in slots.items()}
+    return {snake_case(k): snake_case(v) for k, v in slots.items()}
 
 
 def translate_slots(slots: dict) -> dict:
     """Translate the slots to the corresponding values in the dictionary."""
-    return {k: slots_dictionary.get(k, {}).get(v, v) for k, v in slots.items()}
+    return slot_index.translate(slots)
 
 
 def camel_to_snake(camel_str: str, delimiter: str = '_') -> str:
@@ -30,7 +30,8 @@ def camel_to_snake(camel_str: str, delimiter: str = '_') -> str:
     Returns:
     str: The converted snake_case string.
     """
+    if delimiter == '_':
+        return snake_case(camel_str)
     # Insert an underscore before any uppercase letter followed by a lowercase letter, then lowercase the entire string
-    camel_str.replace('\s', delimiter)
     snake_str = re.sub(r'(?<!^)(?=[A-Z][a-z])', delimiter, camel_str).lower()
     return snake_str
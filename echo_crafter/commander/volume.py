@@ -0,0 +1,192 @@
+"""Control the volume of the default audio sink over a persistent connection to the sound server."""
+
+import re
+import time
+import subprocess
+from importlib.util import find_spec
+from threading import Lock
+from typing import Optional, Protocol, Tuple
+
+from echo_crafter.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MAX_VOLUME = 1.5
+DEFAULT_STEP = 0.05
+
+
+class VolumeBackend(Protocol):
+    """A connection to the sound server, acting on the default sink.
+
+    Volumes are fractions of the nominal volume, e.g. 0.5 for 50%. A `persistent` backend
+    makes operations cheap enough to ramp the volume and read it back after each change.
+    """
+
+    persistent: bool
+
+    def get(self) -> Tuple[float, bool]:
+        """Return the volume and the mute state."""
+        ...
+
+    def set_volume(self, volume: float) -> None:
+        """Set the volume of all channels."""
+        ...
+
+    def change_volume(self, delta: float) -> None:
+        """Change the volume of all channels by `delta`."""
+        ...
+
+    def set_mute(self, mute: bool) -> None:
+        """Mute or unmute."""
+        ...
+
+
+class PulseBackend:
+    """Talk to PulseAudio, or PipeWire's pulse server, through libpulse with `pulsectl`.
+
+    The connection is opened once and reused for every operation. When the sound server goes
+    away, e.g. because it restarted, the connection is reopened and the operation retried once.
+    """
+
+    persistent = True
+
+    def __init__(self):
+        import pulsectl
+
+        self._pulsectl = pulsectl
+        self.pulse = pulsectl.Pulse('echo-crafter')
+
+    def _call(self, operation):
+        """Run an operation on the default sink, reconnecting once if the connection was lost."""
+        try:
+            return operation(self._sink())
+        except self._pulsectl.PulseDisconnected:
+            logger.info("Reconnecting to the sound server")
+            self.pulse.close()
+            self.pulse = self._pulsectl.Pulse('echo-crafter')
+            return operation(self._sink())
+
+    def _sink(self):
+        return self.pulse.get_sink_by_name(self.pulse.server_info().default_sink_name)
+
+    def get(self) -> Tuple[float, bool]:
+        return self._call(lambda sink: (self.pulse.volume_get_all_chans(sink), bool(sink.mute)))
+
+    def set_volume(self, volume: float) -> None:
+        self._call(lambda sink: self.pulse.volume_set_all_chans(sink, volume))
+
+    def change_volume(self, delta: float) -> None:
+        self._call(lambda sink: self.pulse.volume_change_all_chans(sink, delta))
+
+    def set_mute(self, mute: bool) -> None:
+        self._call(lambda sink: self.pulse.mute(sink, mute))
+
+    def close(self) -> None:
+        self.pulse.close()
+
+
+class PactlBackend:
+    """Run `pactl` for every operation, when `pulsectl` is not installed.
+
+    Every operation costs a process, so `VolumeControl` issues a single one per change.
+    """
+
+    persistent = False
+
+    def _run(self, *args: str) -> str:
+        process = subprocess.run(["pactl", *args], capture_output=True, text=True)
+        if process.returncode != 0:
+            raise RuntimeError(f"Error running pactl {' '.join(args)}: {process.stderr.strip()}")
+        return process.stdout
+
+    def get(self) -> Tuple[float, bool]:
+        volumes = re.findall(r'(\d+)%', self._run("get-sink-volume", "@DEFAULT_SINK@"))
+        muted = 'yes' in self._run("get-sink-mute", "@DEFAULT_SINK@")
+        return (sum(map(int, volumes)) / len(volumes) / 100 if volumes else 0.0), muted
+
+    def set_volume(self, volume: float) -> None:
+        self._run("set-sink-volume", "@DEFAULT_SINK@", f"{round(volume * 100)}%")
+
+    def change_volume(self, delta: float) -> None:
+        self._run("set-sink-volume", "@DEFAULT_SINK@", f"{round(delta * 100):+d}%")
+
+    def set_mute(self, mute: bool) -> None:
+        self._run("set-sink-mute", "@DEFAULT_SINK@", '1' if mute else '0')
+
+
+def default_backend() -> VolumeBackend:
+    """Get the native backend if `pulsectl` is installed, else the `pactl` one."""
+    if find_spec('pulsectl') is not None:
+        try:
+            return PulseBackend()
+        except Exception as e:
+            logger.warning("Could not connect to the sound server, falling back to pactl: %s", e)
+    return PactlBackend()
+
+
+class VolumeControl:
+    """Set, step and ramp the volume.
+
+    Operations are serialized, so that quickly repeated steps, e.g. "volume up, up, up",
+    apply one after the other. With a persistent backend, changes are ramped and the applied
+    volume is read back. Otherwise each change is a single operation, and the methods return
+    None since reading the volume back would cost more operations.
+    """
+
+    def __init__(self, backend: Optional[VolumeBackend] = None):
+        """Initialize the control, connecting to the sound server on first use unless a backend is given."""
+        self._backend = backend
+        self._lock = Lock()
+
+    @property
+    def backend(self) -> VolumeBackend:
+        if self._backend is None:
+            self._backend = default_backend()
+        return self._backend
+
+    def get(self) -> Tuple[float, bool]:
+        """Return the volume and the mute state."""
+        with self._lock:
+            return self.backend.get()
+
+    def set(self, volume: float) -> Optional[float]:
+        """Set the volume, clamped to [0, MAX_VOLUME], and return the applied one if cheap to read."""
+        with self._lock:
+            self.backend.set_volume(min(max(volume, 0.0), MAX_VOLUME))
+            return self.backend.get()[0] if self.backend.persistent else None
+
+    def step(self, delta: float = DEFAULT_STEP) -> Optional[float]:
+        """Change the volume by `delta` and return the applied one if cheap to read."""
+        with self._lock:
+            if not self.backend.persistent:
+                self.backend.change_volume(delta)
+                return None
+            volume, _ = self.backend.get()
+            self.backend.set_volume(min(max(volume + delta, 0.0), MAX_VOLUME))
+            return self.backend.get()[0]
+
+    def ramp(self, target: float, duration: float = 0.3, num_steps: int = 10) -> Optional[float]:
+        """Move the volume to `target` gradually over `duration` seconds and return the applied one.
+
+        Without a persistent backend, the volume is set at once.
+        """
+        target = min(max(target, 0.0), MAX_VOLUME)
+        with self._lock:
+            if not self.backend.persistent:
+                self.backend.set_volume(target)
+                return None
+            start, _ = self.backend.get()
+            for i in range(1, num_steps + 1):
+                self.backend.set_volume(start + (target - start) * i / num_steps)
+                if i < num_steps:
+                    time.sleep(duration / num_steps)
+            return self.backend.get()[0]
+
+    def mute(self, mute: bool = True) -> bool:
+        """Mute or unmute and return the mute state."""
+        with self._lock:
+            self.backend.set_mute(mute)
+            return self.backend.get()[1] if self.backend.persistent else mute
+
+
+volume_control = VolumeControl()
@@ -0,0 +1,123 @@
+"""Keep track of the class of the active X11 window without querying it for every command."""
+
+import re
+import subprocess
+from threading import Event, Lock, Thread
+from typing import Callable, Iterable, Iterator, Optional
+
+from echo_crafter.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+RESTART_DELAY_SEC = 1.0
+MAX_RESTART_DELAY_SEC = 60.0
+
+_WINDOW_ID = re.compile(r'window id # (0x[0-9a-fA-F]+)')
+_WM_CLASS = re.compile(r'WM_CLASS\(\w+\) = "([^"]*)", "([^"]*)"')
+
+
+def query_active_window() -> str:
+    """Ask xdotool for the class of the active window."""
+    return subprocess.check_output(
+        ["xdotool", "getactivewindow", "getwindowclassname"]
+    ).decode("utf-8").strip()
+
+
+def xprop_focus_events() -> Iterator[str]:
+    """Yield the class of the active window each time the focus changes.
+
+    A single `xprop -spy` process reports the changes of the root window's `_NET_ACTIVE_WINDOW`
+    property; the class of a newly focused window is read with one more `xprop` call.
+    """
+    with subprocess.Popen(["xprop", "-spy", "-root", "_NET_ACTIVE_WINDOW"],
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True) as spy:
+        assert spy.stdout is not None
+        for line in spy.stdout:
+            match = _WINDOW_ID.search(line)
+            if match is None or int(match.group(1), 16) == 0:
+                continue
+            properties = subprocess.run(["xprop", "-id", match.group(1), "WM_CLASS"],
+                                        capture_output=True, text=True).stdout
+            wm_class = _WM_CLASS.search(properties)
+            if wm_class is not None:
+                yield wm_class.group(2)
+
+
+class WindowTracker:
+    """Serve the class of the active window from memory, updated by a stream of focus events.
+
+    The events are consumed by a daemon thread started on first use. Until the first event
+    arrives, or while the event source is down, the class is queried with the fallback. A source
+    which fails or ends is restarted after a delay, doubled on each consecutive failure up to
+    `max_restart_delay` and reset once the restarted source yields an event. Any function
+    returning an iterable of window classes can serve as the event source, e.g.
+    `lambda: ['Emacs']` in tests.
+    """
+
+    def __init__(self,
+                 source: Callable[[], Iterable[str]] = xprop_focus_events,
+                 fallback: Callable[[], str] = query_active_window,
+                 *,
+                 restart_delay: float = RESTART_DELAY_SEC,
+                 max_restart_delay: float = MAX_RESTART_DELAY_SEC):
+        """Initialize the tracker.
+
+        Args:
+            source: A function returning the iterable of the classes of the successively focused windows.
+            fallback: A function querying the class of the active window.
+            restart_delay: The number of seconds to wait before restarting a failed source.
+            max_restart_delay: The maximal number of seconds to wait before restarting the source.
+        """
+        self.source = source
+        self.fallback = fallback
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self._lock = Lock()
+        self._window_class: Optional[str] = None
+        self._thread: Optional[Thread] = None
+        self._stopped = Event()
+
+    def _follow(self) -> None:
+        """Update the active window class with the events of the source, restarting it until stopped."""
+        delay = self.restart_delay
+        while not self._stopped.is_set():
+            try:
+                for window_class in self.source():
+                    if self._stopped.is_set():
+                        return
+                    with self._lock:
+                        self._window_class = window_class
+                    delay = self.restart_delay
+            except Exception as e:
+                logger.warning("Lost track of the active window, restarting in %.1fs: %s", delay, e)
+            else:
+                logger.info("The focus events ended, restarting in %.1fs", delay)
+            finally:
+                with self._lock:
+                    self._window_class = None
+            if self._stopped.wait(delay):
+                return
+            delay = min(2 * delay, self.max_restart_delay)
+
+    def start(self) -> None:
+        """Start following the focus events, unless already doing so."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = Thread(target=self._follow, name="window_tracker", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Stop following the focus events after the next one, or right away while waiting to restart the source."""
+        self._stopped.set()
+
+    def active_window(self) -> str:
+        """Return the class of the active window."""
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            window_class = self._window_class
+        return window_class if window_class is not None else self.fallback()
+
+
+window_tracker = WindowTracker()
@@ -1,8 +1,8 @@
 """@file Configuration for the echo-crafter package."""
 
-from subprocess import check_output
 from pathlib import Path
 from typing import Literal, List, Optional, TypedDict
+from .secret_store import LazyConfig, get_secret
 
 
 def get_project_root() -> Path:
@@ -10,11 +10,6 @@ def get_project_root() -> Path:
     return Path(__file__).resolve().parent.parent.parent
 
 
-def password_store_get(provider: str, key: str) -> str:
-    """Get a password from the password store."""
-    return str(check_output(["pass", f"echo_crafter/{provider}_{key}"]), encoding="utf-8").strip()
-
-
 def build_path(rel_path: str) -> str:
     """Build an absolute path from the given path relative to root."""
     path = get_project_root() / rel_path
@@ -56,17 +51,16 @@ class _Config(TypedDict):
     INTENT_SUCCESS_WAV: str
 
 
-Config: _Config = {
+# The API keys are resolved on first access, see `secret_store.get_secret`.
+Config: _Config = LazyConfig({  # type: ignore[assignment]
     "PROJECT_ROOT":            str(get_project_root()),
     "DATA_DIR":                build_path("data"),
     "CONTROLLERS_DIR":         build_path("echo_crafter/commander/controllers"),
 
-    "PICOVOICE_API_KEY":       password_store_get('picovoice', 'api_key'),
-    "DEEPGRAM_API_KEY":        password_store_get('deepgram', 'api_key'),
-
     "FRAME_RATE":              16000,
     "FRAME_LENGTH":            512,
-    "BUFFER_SIZE":             512 * 2 * 15,  # 15 seconds
+    "CHANNELS":                1,
+    "BUFFER_SIZE":             16000 * 15,  # 15 seconds of samples
     "ENDPOINT_DURATION_SEC":   1.5,
 
     "PORCUPINE_KEYWORD_FILE":  build_path("data/Pierrette_fr_linux_v3_0_0.ppn"),
@@ -86,4 +80,7 @@ Config: _Config = {
 
     "WAKE_WORD_DETECTED_WAV":  build_path("data/transcript_begin.wav"),
     "INTENT_SUCCESS_WAV":      build_path("data/transcript_success.wav"),
-}
+}, secrets={
+    "PICOVOICE_API_KEY":       lambda: get_secret('picovoice', 'api_key'),
+    "DEEPGRAM_API_KEY":        lambda: get_secret('deepgram', 'api_key'),
+})
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 import os
 from pathlib import Path
 from typing import Literal, TypedDict
+from .secret_store import LazyConfig
 
 
 def get_api_key(provider: Literal['openai', 'anthropic']) -> str:
@@ -22,6 +23,16 @@ def get_openai_log_path() -> str:
     xdg_data_dir = Path(os.getenv("XDG_DATA_HOME") or Path.home()/".local/share")
     return str(xdg_data_dir/"openai/new_logs.jsonl")
 
+def get_openai_log_store_path() -> str:
+    """Get the path to the indexed OpenAI log store."""
+    xdg_data_dir = Path(os.getenv("XDG_DATA_HOME") or Path.home()/".local/share")
+    return str(xdg_data_dir/"openai/logs.msgpack")
+
+def get_response_cache_path() -> str:
+    """Get the path to the cache of chat completion answers."""
+    xdg_cache_dir = Path(os.getenv("XDG_CACHE_HOME") or Path.home()/".cache")
+    return str(xdg_cache_dir/"openai/response_cache.json")
+
 def get_history_file() -> str:
     """Get the path to the OpenAI history file."""
     xdg_data_dir = Path(os.getenv("XDG_DATA_HOME") or Path.home()/".local/share")
@@ -58,15 +69,21 @@ class _LLMConfig(TypedDict):
 
     API_KEY: str
     LOG_FILE: str
+    LOG_STORE: str
     HISTORY_FILE: str
+    CACHE_FILE: str
+    MAX_CONTEXT_TOKENS: int
     DEFAULT_MODEL: str
     MODELS: list[Model]
 
 
-LLMConfig: _LLMConfig = {
-    "API_KEY": get_api_key('openai'),
+# The API key is resolved on first access, so that importing the configuration never fails.
+LLMConfig: _LLMConfig = LazyConfig({  # type: ignore[assignment]
     "LOG_FILE": get_openai_log_path(),
+    "LOG_STORE": get_openai_log_store_path(),
     "HISTORY_FILE": get_history_file(),
+    "CACHE_FILE": get_response_cache_path(),
+    "MAX_CONTEXT_TOKENS": int(os.getenv("ECHO_CRAFTER_MAX_CONTEXT_TOKENS", 4096)),
     "MODELS": [
         {
             "name": "gpt-4-0125-preview",
@@ -86,4 +103,6 @@ LLMConfig: _LLMConfig = {
         }
     ],
     "DEFAULT_MODEL": "gpt-4-0125-preview"
-}
+}, secrets={
+    "API_KEY": lambda: get_api_key('openai'),
+})
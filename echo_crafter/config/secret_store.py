@@ -0,0 +1,127 @@
+"""@file Lazy resolution and caching of the secrets used by the echo-crafter package."""
+
+import os
+import json
+import stat
+import time
+import tempfile
+from pathlib import Path
+from subprocess import check_output
+from typing import Callable, Dict
+
+
+DEFAULT_TTL_SEC = 12 * 3600
+
+
+def password_store_get(provider: str, key: str) -> str:
+    """Get a password from the password store."""
+    return str(check_output(["pass", f"echo_crafter/{provider}_{key}"]), encoding="utf-8").strip()
+
+
+def env_var_name(provider: str, key: str) -> str:
+    """Get the name of the environment variable overriding a secret."""
+    return f"ECHO_CRAFTER_{provider}_{key}".upper()
+
+
+def get_cache_file() -> Path:
+    """Get the path to the secrets cache file.
+
+    It lives in the user's runtime directory, which is private to the user and
+    does not outlive their session.
+    """
+    runtime_dir = Path(os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir())
+    return runtime_dir / f"echo_crafter-{os.getuid()}" / "secrets.json"
+
+
+def get_ttl() -> float:
+    """Get the number of seconds a cached secret stays valid."""
+    return float(os.getenv("ECHO_CRAFTER_SECRETS_TTL", DEFAULT_TTL_SEC))
+
+
+def _is_private(path: Path, *, mode: int) -> bool:
+    """Check that a path is owned by the current user, is not a symbolic link, and has exactly the given permissions."""
+    st = path.lstat()
+    return not stat.S_ISLNK(st.st_mode) and st.st_uid == os.getuid() and stat.S_IMODE(st.st_mode) == mode
+
+
+def _read_cache(cache_file: Path) -> Dict[str, dict]:
+    """Read the cached secrets, ignoring a missing, corrupted or insecure cache file.
+
+    The cache file and its directory must both belong to the current user and be private to them,
+    since another user could otherwise plant secrets of their own in there.
+    """
+    try:
+        if not (_is_private(cache_file.parent, mode=0o700) and _is_private(cache_file, mode=0o600)):
+            return {}
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache_file: Path, cache: Dict[str, dict]) -> None:
+    """Atomically write the cached secrets to a file only readable by the current user.
+
+    Caching is skipped when the directory of the cache file, e.g. one pre-created in a shared
+    temporary directory by another user, is not private to the current user, or on any error.
+    """
+    tmp_path = None
+    try:
+        cache_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not _is_private(cache_file.parent, mode=0o700):
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def get_secret(provider: str, key: str) -> str:
+    """Get a secret, trying the environment, the cache file and the password store in that order.
+
+    A secret obtained from the password store is written to the cache file, so that only the first
+    process of a session pays for the `pass` (and possibly GPG) invocations.
+
+    Args:
+        provider: The provider of the secret, e.g. 'picovoice'.
+        key: The name of the secret, e.g. 'api_key'.
+    """
+    value = os.getenv(env_var_name(provider, key))
+    if value:
+        return value
+
+    name = f"{provider}_{key}"
+    cache_file = get_cache_file()
+    cache = _read_cache(cache_file)
+    entry = cache.get(name)
+    if entry is not None and entry.get('expires', 0) > time.time():
+        return entry['value']
+
+    value = password_store_get(provider, key)
+    cache[name] = {'value': value, 'expires': time.time() + get_ttl()}
+    _write_cache(cache_file, cache)
+    return value
+
+
+class LazyConfig(dict):
+    """A configuration dictionary whose secret entries are only resolved on first access."""
+
+    def __init__(self, values: dict, *, secrets: Dict[str, Callable[[], str]]):
+        """Initialize the configuration.
+
+        Args:
+            values: The entries known in advance.
+            secrets: A function returning the value of each secret entry.
+        """
+        super().__init__(values)
+        self._secrets = secrets
+
+    def __missing__(self, key):
+        """Resolve a secret entry and keep its value."""
+        if key not in self._secrets:
+            raise KeyError(key)
+        value = self[key] = self._secrets[key]()
+        return value
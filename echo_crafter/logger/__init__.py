@@ -1,13 +1,22 @@
 """Logging module for the Echo Crafter application."""
 
+import atexit
 import logging
+import logging.handlers
 import json
 import time
 import os
+import sys
 from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from typing import Dict
 
 LOG_FILE = Path(os.environ.get('EC_LOG_DIR', '')) / "transcripts.jsonl"
 ONLY_TRUE_ONCE = True
+BATCH_SIZE = 64
+FLUSH_INTERVAL_SEC = 0.5
+MAX_PENDING_RECORDS = 10000
 
 
 class CustomRecord(logging.LogRecord):
@@ -28,15 +37,144 @@ class JsonFormatter(logging.Formatter):
         """Format a log record as a JSON string."""
         log_dict = record.__dict__.copy()
         log_dict['msg'] = record.getMessage()
-        return json.dumps(log_dict)
+        if record.exc_info:
+            log_dict['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(log_dict, default=str)
+
+
+class BatchWriter(Thread):
+    """Background thread formatting log records and appending them to a file in batches.
+
+    The thread sleeps until a record arrives, then keeps collecting records until either
+    `batch_size` of them are pending or `flush_interval` seconds have passed, and writes
+    them all at once.
+    """
+
+    def __init__(self, path: Path, *,
+                 batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL_SEC,
+                 max_pending: int = MAX_PENDING_RECORDS):
+        """Create the writer for the given file, which is opened right away. Records are put on its `queue`.
+
+        Raises:
+            OSError: If the file cannot be opened.
+        """
+        super().__init__(name=f"log_writer:{path.name}", daemon=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: Queue = Queue(maxsize=max_pending)
+        self.formatter = JsonFormatter()
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def run(self):
+        """Write the incoming records until the `None` sentinel is received."""
+        with self.file as f:
+            done = False
+            while not done:
+                batch = [self.queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(self.queue.get(timeout=timeout))
+                    except Empty:
+                        break
+                if None in batch:
+                    done = True
+                    batch = batch[:batch.index(None)]
+                lines = []
+                for record in batch:
+                    try:
+                        lines.append(self.formatter.format(record) + '\n')
+                    except Exception:
+                        lines.append(json.dumps({'msg': str(record.msg), 'error': 'unserializable record'}) + '\n')
+                f.writelines(lines)
+                f.flush()
+
+    def stop(self, timeout: float = 1.0):
+        """Write the pending records and stop the thread."""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except Full:
+            return
+        self.join(timeout)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler which leaves the serialization of records to the writer thread.
+
+    Only the message is interpolated on the calling thread, in case its arguments change later on.
+    Records are dropped when the queue is full, i.e. when the writer thread cannot keep up or
+    died, rather than blocking the caller or piling up in memory.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record):
+        """Put the record on the queue, unless it is full."""
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        """Interpolate the message of the record."""
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_writers: Dict[Path, BatchWriter] = {}
+_handlers: Dict[Path, logging.Handler] = {}
+_lock = Lock()
+
+
+def get_handler(log_file=LOG_FILE) -> logging.Handler:
+    """Get the handler writing to the given file, starting its writer thread on first use.
+
+    If the file cannot be opened, e.g. because `EC_LOG_DIR` does not exist, the records are
+    written to stderr instead.
+    """
+    path = Path(log_file).resolve()
+    with _lock:
+        if path not in _handlers:
+            try:
+                writer = BatchWriter(path)
+            except OSError as e:
+                print(f"Cannot open the log file, logging to stderr instead: {e}", file=sys.stderr)
+                handler = logging.StreamHandler(sys.stderr)
+                handler.setFormatter(JsonFormatter())
+                _handlers[path] = handler
+            else:
+                writer.start()
+                _writers[path] = writer
+                _handlers[path] = NonBlockingQueueHandler(writer.queue)
+        return _handlers[path]
+
+
+@atexit.register
+def shutdown():
+    """Stop all writer threads after they wrote their pending records."""
+    with _lock:
+        writers = list(_writers.values())
+        _writers.clear()
+        _handlers.clear()
+    for writer in writers:
+        writer.stop()
 
 
 def setup_logger(name, level=logging.INFO):
-    """Set up a logger with a JSON formatter."""
+    """Set up a logger with a JSON formatter.
+
+    All loggers share one handler per log file, and records are written by a background thread.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(level)
     logging.setLogRecordFactory(CustomRecord)
-    handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
-    handler.setFormatter(JsonFormatter())
-    logger.addHandler(handler)
+    handler = get_handler(LOG_FILE)
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
     return logger
@@ -0,0 +1,157 @@
+"""Append-only log of msgpack records with a sidecar index for fast lookups."""
+
+import os
+import time
+import fcntl
+import struct
+import bisect
+import msgpack
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+LENGTH = struct.Struct('<I')
+INDEX_ENTRY = struct.Struct('<Qd')
+
+
+class LogStore:
+    """An append-only log of msgpack records.
+
+    Each record is stored in the data file as a 4-byte little-endian length followed by its
+    msgpack payload. The index file holds one fixed-size `(offset, timestamp)` entry per record,
+    so looking a record up by its position takes two seeks regardless of the size of the log,
+    and looking records up by time is a binary search over the index.
+
+    Records are expected to be appended in chronological order.
+    """
+
+    def __init__(self, path):
+        """Open the log stored at `path`, with its index at `path` + '.idx'."""
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + '.idx')
+
+    def exists(self) -> bool:
+        """Check whether the log has been created."""
+        return self.index_path.exists()
+
+    def __len__(self) -> int:
+        """Return the number of records."""
+        try:
+            return self.index_path.stat().st_size // INDEX_ENTRY.size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, record, timestamp: Optional[float] = None) -> int:
+        """Append a record and return its position.
+
+        Args:
+            record: Any object msgpack can serialize.
+            timestamp: The time of the record. Defaults to its `timestamp` key if it has one, else to now.
+        """
+        if timestamp is None:
+            timestamp = record.get('timestamp') if isinstance(record, dict) else None
+        if timestamp is None:
+            timestamp = time.time()
+        payload = msgpack.packb(record, use_bin_type=True)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'ab') as data, open(self.index_path, 'ab') as index:
+            fcntl.flock(data, fcntl.LOCK_EX)
+            try:
+                offset = data.seek(0, os.SEEK_END)
+                data.write(LENGTH.pack(len(payload)) + payload)
+                data.flush()
+                position = index.seek(0, os.SEEK_END) // INDEX_ENTRY.size
+                index.write(INDEX_ENTRY.pack(offset, timestamp))
+                index.flush()
+            finally:
+                fcntl.flock(data, fcntl.LOCK_UN)
+        return position
+
+    def _read_entry(self, index, position: int):
+        """Read the `(offset, timestamp)` index entry at the given position."""
+        index.seek(position * INDEX_ENTRY.size)
+        return INDEX_ENTRY.unpack(index.read(INDEX_ENTRY.size))
+
+    def _read_record(self, data, offset: int):
+        """Read the record stored at the given offset of the data file."""
+        data.seek(offset)
+        (length,) = LENGTH.unpack(data.read(LENGTH.size))
+        return msgpack.unpackb(data.read(length), raw=False)
+
+    def __getitem__(self, position: int):
+        """Return the record at the given position, counting from the end if negative."""
+        size = len(self)
+        if position < 0:
+            position += size
+        if not 0 <= position < size:
+            raise IndexError("log position out of range")
+        with open(self.path, 'rb') as data, open(self.index_path, 'rb') as index:
+            offset, _ = self._read_entry(index, position)
+            return self._read_record(data, offset)
+
+    def iter_range(self, start: int = 0, stop: Optional[int] = None) -> Iterator[tuple]:
+        """Yield the `(position, record)` pairs with positions in `[start, stop)`, negative values counting from the end."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if start >= stop:
+            return
+        with open(self.path, 'rb') as data, open(self.index_path, 'rb') as index:
+            offset, _ = self._read_entry(index, start)
+            data.seek(offset)
+            unpacker = msgpack.Unpacker(raw=False)
+            for position in range(start, stop):
+                (length,) = LENGTH.unpack(data.read(LENGTH.size))
+                unpacker.feed(data.read(length))
+                yield position, next(unpacker)
+
+    def tail(self, n: int) -> List:
+        """Return the last `n` records."""
+        return [record for _, record in self.iter_range(-n if n > 0 else len(self))]
+
+    def bisect_time(self, timestamp: float) -> int:
+        """Return the position of the first record at or after the given time."""
+        with open(self.index_path, 'rb') as index:
+            timestamps = _IndexTimestamps(self, index)
+            return bisect.bisect_left(timestamps, timestamp)
+
+    def since(self, start_time: float, end_time: Optional[float] = None) -> Iterator[tuple]:
+        """Yield the `(position, record)` pairs whose time is in `[start_time, end_time)`."""
+        start = self.bisect_time(start_time)
+        stop = self.bisect_time(end_time) if end_time is not None else None
+        return self.iter_range(start, stop)
+
+
+class _IndexTimestamps:
+    """A lazy sequence of the timestamps of an index file, for use with `bisect`."""
+
+    def __init__(self, store: LogStore, index):
+        self.store = store
+        self.index = index
+        self.size = len(store)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, position):
+        return self.store._read_entry(self.index, position)[1]
+
+
+def import_jsonl(jsonl_path, store: LogStore) -> int:
+    """Append every record of a JSONL file to the given log store and return their number."""
+    import json
+
+    count = 0
+    with open(jsonl_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                store.append(json.loads(line))
+                count += 1
+    return count
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python -m echo_crafter.logger.log_store <input_jsonl_file_path> <log_store_path>")
+        sys.exit(1)
+    print(f"Imported {import_jsonl(sys.argv[1], LogStore(sys.argv[2]))} records")
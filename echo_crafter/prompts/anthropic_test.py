@@ -6,6 +6,7 @@ from rich.markdown import Markdown
 from typing import Iterable, List, Literal, Optional, Tuple, TypedDict
 from anthropic import Anthropic
 from anthropic.types import Message as AnthropicResponse
+from echo_crafter.utils.http_clients import clients
 
 console = Console()
 
@@ -85,7 +86,7 @@ def prompt_claude_3(
     """
     # Ensure that the ANTHROPIC_API_KEY environment variable is set
     if client is None:
-        client = Anthropic()
+        client = clients.anthropic()
 
     payload = make_payload(model=model, messages=messages, max_tokens=max_tokens, temperature=temperature, stop_sequences=stop_sequences)
 
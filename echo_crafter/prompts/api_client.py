@@ -0,0 +1,179 @@
+"""Asynchronous client for the OpenAI and Anthropic chat APIs."""
+
+import json
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from echo_crafter.config import LLMConfig
+from echo_crafter.logger import setup_logger
+from echo_crafter.utils.http_clients import client_options
+from .config import ChatConfig
+
+logger = setup_logger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = {'openai': 4, 'anthropic': 2}
+DEFAULT_ANTHROPIC_MAX_TOKENS = 1024
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+
+def infer_provider(model: str) -> str:
+    """Get the provider of a model from its name."""
+    return 'anthropic' if model.startswith('claude') else 'openai'
+
+
+def to_anthropic_payload(model: str, messages: List[dict], params: dict) -> dict:
+    """Convert an OpenAI style request to the Anthropic messages format.
+
+    The system messages are joined into the `system` parameter, except for the named
+    `example_user` and `example_assistant` ones, which become regular turns.
+    """
+    system = []
+    turns = []
+    for message in messages:
+        role, name = message['role'], message.get('name')
+        if role == 'system' and name in ('example_user', 'example_assistant'):
+            role = name.removeprefix('example_')
+        if role == 'system':
+            system.append(message['content'])
+        else:
+            turns.append({'role': role, 'content': message['content']})
+
+    payload = {'model': model, 'messages': turns, 'max_tokens': DEFAULT_ANTHROPIC_MAX_TOKENS, **params}
+    if system:
+        payload['system'] = '\n\n'.join(system)
+    return payload
+
+
+class LLMAPIClient:
+    """Send chat requests to the OpenAI and Anthropic APIs from an asyncio event loop.
+
+    - At most `max_concurrency[provider]` requests are in flight for each provider.
+    - Requests failing with a 429 or 5xx status, or a connection error, are retried with
+      exponential backoff and jitter, honoring the `Retry-After` header when there is one.
+    - Identical requests made while one of them is in flight share its response.
+
+    The SDK clients are created on first use, on the running event loop, and their own retries
+    are disabled. Use `aclose`, or the client as an async context manager, to close their connections.
+    """
+
+    def __init__(self, config: Optional[ChatConfig] = None, *,
+                 max_concurrency: Optional[Dict[str, int]] = None,
+                 max_retries: int = 4,
+                 base_delay: float = 0.5,
+                 max_delay: float = 20.0):
+        """Initialize the client.
+
+        Args:
+            config: The configuration of the conversation, whose provider is used by default.
+            max_concurrency: The maximal number of requests in flight for each provider.
+            max_retries: The number of retries of a failed request.
+            base_delay: The delay before the first retry, doubled for each following one.
+            max_delay: The maximal delay between two attempts.
+        """
+        self.default_provider = config.provider if config is not None else None
+        self.max_concurrency = {**DEFAULT_MAX_CONCURRENCY, **(max_concurrency or {})}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._sdk_clients: Dict[str, Any] = {}
+        self._errors: Dict[str, Tuple[type, type]] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {'requests': 0, 'coalesced': 0, 'retries': 0}
+
+    def _client(self, provider: str):
+        """Get the SDK client of a provider, along with its status and connection error types."""
+        if provider not in self._sdk_clients:
+            http_client = httpx.AsyncClient(**client_options())
+            if provider == 'openai':
+                import openai
+                self._sdk_clients[provider] = openai.AsyncOpenAI(
+                    api_key=LLMConfig['API_KEY'], http_client=http_client, max_retries=0)
+                self._errors[provider] = (openai.APIStatusError, openai.APIConnectionError)
+            elif provider == 'anthropic':
+                import anthropic
+                self._sdk_clients[provider] = anthropic.AsyncAnthropic(http_client=http_client, max_retries=0)
+                self._errors[provider] = (anthropic.APIStatusError, anthropic.APIConnectionError)
+            else:
+                raise ValueError(f"Unsupported provider: {provider}")
+            self._semaphores[provider] = asyncio.Semaphore(self.max_concurrency[provider])
+        return self._sdk_clients[provider], self._errors[provider]
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Get the delay before retrying a request which failed for the given attempt."""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return min(float(retry_after), self.max_delay)  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            delay = min(self.base_delay * 2 ** attempt, self.max_delay)
+            return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _with_retries(self, provider: str, send: Callable[[], Awaitable[Any]]):
+        """Send a request within the provider's concurrency limit, retrying it on transient errors."""
+        _, (status_error, connection_error) = self._client(provider)
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphores[provider]:
+                    self.stats['requests'] += 1
+                    return await send()
+            except (status_error, connection_error) as e:
+                retryable = isinstance(e, connection_error) or getattr(e, 'status_code', None) in RETRY_STATUS_CODES
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt, e)
+                logger.info("Retrying a %s request in %.2fs after: %s", provider, delay, e)
+                self.stats['retries'] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _query(self, provider: str, model: str, messages: List[dict], params: dict) -> str:
+        """Send a chat request and return the content of its answer."""
+        client, _ = self._client(provider)
+        if provider == 'anthropic':
+            payload = to_anthropic_payload(model, messages, params)
+            response = await self._with_retries(provider, lambda: client.messages.create(**payload))
+            return ''.join(block.text for block in response.content if block.type == 'text')
+
+        payload = {'model': model, 'messages': messages, **params}
+        response = await self._with_retries(provider, lambda: client.chat.completions.create(**payload))
+        return response.choices[0].message.content or ''
+
+    async def query(self, *, model: str, messages: List[dict], provider: Optional[str] = None, **params) -> str:
+        """Send a chat request and return the content of its answer.
+
+        Args:
+            model: The name of the model.
+            messages: The messages of the conversation, in the OpenAI format.
+            provider: Either 'openai' or 'anthropic'. Inferred from the model by default.
+            params: Extra parameters of the request, e.g. `temperature` or `max_tokens`.
+        """
+        provider = provider or self.default_provider or infer_provider(model)
+        params = {key: value for key, value in params.items() if value is not None}
+        key = json.dumps([provider, model, messages, params], sort_keys=True, default=str)
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._query(provider, model, messages, params))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def aclose(self) -> None:
+        """Close the connections of the SDK clients."""
+        clients, self._sdk_clients = list(self._sdk_clients.values()), {}
+        for client in clients:
+            await client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
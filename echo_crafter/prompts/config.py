@@ -0,0 +1,40 @@
+"""@file Configuration of the conversations held through `LLMInterface`."""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class ChatConfig:
+    """The model, prompt and request parameters of a conversation.
+
+    Attributes:
+        model: The name of the model, e.g. 'gpt-4-0125-preview' or 'claude-3-haiku-20240307'.
+        system_message: The system messages sent first.
+        example_messages: The example exchanges sent after the system messages.
+        api_parameters: Extra parameters of the requests, e.g. `temperature` or `max_tokens`.
+        provider: The provider of the model, inferred from its name when not given.
+    """
+
+    model: str
+    system_message: List[dict] = field(default_factory=list)
+    example_messages: List[dict] = field(default_factory=list)
+    api_parameters: Dict[str, Any] = field(default_factory=dict)
+    provider: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, config: dict) -> 'ChatConfig':
+        """Create the configuration from a dictionary with the same keys as the attributes."""
+        return cls(**config)
+
+    @classmethod
+    def from_file(cls, path) -> 'ChatConfig':
+        """Create the configuration from a JSON or YAML file."""
+        path = Path(path)
+        with open(path, 'r') as f:
+            if path.suffix in ('.yml', '.yaml'):
+                import yaml
+                return cls.from_dict(yaml.safe_load(f))
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,98 @@
+"""Token-budgeted conversation history for the chat completion clients."""
+
+import copy
+from importlib.util import find_spec
+from typing import Callable, List, Optional, Sequence, Tuple
+
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def make_token_counter(model: str) -> Callable[[str], int]:
+    """Get a function counting the tokens of a text for the given model.
+
+    The count is exact when `tiktoken` is installed, and estimated at four characters per token otherwise.
+    """
+    if find_spec('tiktoken') is None:
+        return lambda text: len(text) // 4 + 1
+
+    import tiktoken
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class ConversationContext:
+    """The messages of a conversation, trimmed to a token budget.
+
+    The pinned messages, i.e. the system prompt and its examples, are always sent. The turns of
+    the conversation which come after them are dropped oldest first, one exchange at a time,
+    until the prompt fits in `max_tokens`; the latest exchange is always kept. When a `summarize`
+    function is given, the dropped exchanges are folded into a summary sent right after the
+    pinned messages instead of being forgotten.
+
+    The pinned messages are copied, so the prompt templates are never modified.
+    """
+
+    def __init__(self, pinned: Sequence[dict], *, max_tokens: int,
+                 count_tokens: Callable[[str], int],
+                 summarize: Optional[Callable[[Optional[str], List[dict]], str]] = None):
+        """Initialize the context.
+
+        Args:
+            pinned: The messages to send with every request.
+            max_tokens: The budget of prompt tokens.
+            count_tokens: A function counting the tokens of a text.
+            summarize: A function summarizing the previous summary, if any, along with dropped messages.
+        """
+        self.pinned = copy.deepcopy(list(pinned))
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self.summarize = summarize
+        self.transcript: List[dict] = list(self.pinned)
+        self.summary: Optional[str] = None
+        self._turns: List[Tuple[dict, int]] = []
+        self._pinned_tokens = sum(self._count(message) for message in self.pinned)
+        self._summary_tokens = 0
+        self._turn_tokens = 0
+
+    def _count(self, message: dict) -> int:
+        """Count the tokens of a message, including the overhead of its role and name."""
+        return self.count_tokens(message.get('content') or '') + MESSAGE_OVERHEAD_TOKENS
+
+    @property
+    def num_tokens(self) -> int:
+        """Return the number of tokens of the messages which are sent."""
+        return self._pinned_tokens + self._summary_tokens + self._turn_tokens
+
+    def append(self, message: dict) -> None:
+        """Add a message to the conversation, trimming the older turns if over budget."""
+        self.transcript.append(message)
+        num_tokens = self._count(message)
+        self._turns.append((message, num_tokens))
+        self._turn_tokens += num_tokens
+        self._trim()
+
+    def _trim(self) -> None:
+        """Drop the oldest exchanges until the messages fit in the budget."""
+        dropped = []
+        while self.num_tokens > self.max_tokens:
+            end = next((i for i, (message, _) in enumerate(self._turns) if i > 0 and message['role'] == 'user'), None)
+            if end is None:
+                break
+            for message, num_tokens in self._turns[:end]:
+                dropped.append(message)
+                self._turn_tokens -= num_tokens
+            del self._turns[:end]
+        if dropped and self.summarize is not None:
+            self.summary = self.summarize(self.summary, dropped)
+            self._summary_tokens = self._count({'content': self.summary})
+
+    def window(self) -> List[dict]:
+        """Return the messages to send."""
+        messages = list(self.pinned)
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        messages.extend(message for message, _ in self._turns)
+        return messages
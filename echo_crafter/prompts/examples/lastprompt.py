@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
-import json
 import os
+from echo_crafter.prompts.history import read_last
 
 LLM_API_HISTORY = f"{os.getenv('XDG_DATA_HOME')}/openai/logs.jsonl"
 
@@ -17,12 +17,8 @@ def format(content):
     return '\n'.join(result) if result else content
 
 
-# read the last line of a jsonl file
-with open(LLM_API_HISTORY, 'r') as f:
-    last_line = list(f)[-1]
-
-# convert the last line into json object
-obj = json.loads(last_line)
+# read the last record of the jsonl file, seeking from its end
+obj = read_last(LLM_API_HISTORY)
 
 # print the content
 print(format(obj['responses'][0]['message']['content']))
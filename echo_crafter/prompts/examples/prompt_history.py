@@ -2,15 +2,18 @@
 
 import argparse
 import json
-import os
 from pathlib import Path
 import sys
 import traceback
 from rich.traceback import install
+from echo_crafter.config import LLMConfig
+from echo_crafter.logger.log_store import LogStore
+from echo_crafter.prompts.history import find_start, iter_records
 
 install()
 
-LLM_API_HISTORY = f"{os.getenv('XDG_DATA_HOME')}/openai/new_logs.jsonl"
+LLM_API_HISTORY = LLMConfig['LOG_FILE']
+LLM_API_STORE = LLMConfig['LOG_STORE']
 
 
 def format(content):
@@ -32,7 +35,7 @@ def format(content):
 
 
 def print_entry(index, line):
-    data = json.loads(line)
+    data = json.loads(line) if isinstance(line, str) else line
     language = data.get('language', '')
     timestamp = data.get('timestamp', 0)
     model = data.get('model', None)
@@ -59,28 +62,51 @@ def print_entry(index, line):
 
 
 def main():
-    """Retrieve the queried history entries."""
-    # Parse command line arguments
-    if not Path(LLM_API_HISTORY).exists():
-        print(f"LLM_API_HISTORY file not found: {LLM_API_HISTORY}", file=sys.stderr)
-        sys.exit(1)
+    """Retrieve the queried history entries.
 
+    The indexed log store is used when it exists. Otherwise the JSONL history is read backwards
+    from its end, so that only the queried entries are read. Either way, entries are indexed from
+    the start of history when a positive `number` is given, and relative to its end otherwise.
+    """
     parser = argparse.ArgumentParser()
-    parser.add_argument('number', nargs='?', const=1, default=-5, type=int, help='Refers to event at index `number` if positive, else refers to event relative to the end of history')
+    parser.add_argument('number', nargs='?', const=1, default=None, type=int, help='Refers to event at index `number` if positive, else refers to event relative to the end of history')
+    parser.add_argument('--last', type=int, help='Print the last LAST events')
+    parser.add_argument('--since', type=float, help='Print the events at or after the unix timestamp SINCE')
     args = parser.parse_args()
 
-    with open(LLM_API_HISTORY, 'r') as file:
-        lines = file.readlines()
+    last = args.last
+    if args.number is None and args.last is None and args.since is None:
+        last = 5
+    elif args.number is not None and args.number < 0:
+        last = -args.number
+
+    store = LogStore(LLM_API_STORE)
+    if store.exists():
+        start = args.number if args.number is not None and args.number >= 0 else 0
+        if last is not None:
+            start = max(start, len(store) - last)
+        # Index like the JSONL fallback: relative to the end unless an absolute index was queried
+        shift = len(store) if args.number is None or args.number < 0 else 0
+        records = store.since(args.since) if args.since is not None else store.iter_range(start)
+        for index, record in records:
+            if index >= start:
+                print_entry(index - shift, record)
+        return
 
-    if args.number < 0:
-        lines = list(lines)
-        number = max(0, len(lines) + args.number)
-    else:
-        number = args.number
+    if not Path(LLM_API_HISTORY).exists():
+        print(f"LLM_API_HISTORY file not found: {LLM_API_HISTORY}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.number is not None and args.number >= 0:
+        with open(LLM_API_HISTORY, 'r') as file:
+            for indexed_line in enumerate(file):
+                if indexed_line[0] >= args.number:
+                    print_entry(*indexed_line)
+        return
 
-    lines_to_print = (el for el in enumerate(lines) if el[0]+1 > number)
-    for indexed_line in lines_to_print:
-        print_entry(*indexed_line)
+    offset, count = find_start(LLM_API_HISTORY, last=last, since=args.since)
+    for index, record in enumerate(iter_records(LLM_API_HISTORY, offset), start=-count):
+        print_entry(index, record)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,78 @@
+"""Read the most recent entries of a JSONL history file without reading the whole file."""
+
+import os
+import json
+from typing import Iterator, Optional, Tuple
+
+BLOCK_SIZE = 64 * 1024
+
+
+def iter_lines_reversed(path, *, block_size: int = BLOCK_SIZE) -> Iterator[Tuple[int, bytes]]:
+    """Yield the `(offset, line)` pairs of a file from its last line to its first.
+
+    The file is read backwards in blocks of `block_size` bytes, so that the cost of reaching
+    a line only depends on its distance to the end of the file. Empty lines are skipped.
+    """
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            lines = chunk.split(b'\n')
+            remainder = lines.pop(0)
+            offset = position + len(chunk) + 1
+            for line in reversed(lines):
+                offset -= len(line) + 1
+                if line.strip():
+                    yield offset, line
+        if remainder.strip():
+            yield 0, remainder
+
+
+def iter_records(path, offset: int = 0) -> Iterator[dict]:
+    """Yield the records of a JSONL file from the given offset to the end, one at a time."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def find_start(path, *, last: Optional[int] = None, since: Optional[float] = None, key: str = 'timestamp') -> Tuple[int, int]:
+    """Locate the first of the last `last` records and/or of the records at or after `since`.
+
+    Only the lines from the end of the file up to that record are read.
+
+    Returns:
+        The offset of that record, and the number of records from there to the end of the file.
+    """
+    offset, count = os.path.getsize(path), 0
+    if last == 0:
+        return offset, count
+    for line_offset, line in iter_lines_reversed(path):
+        if since is not None and json.loads(line).get(key, 0) < since:
+            break
+        offset, count = line_offset, count + 1
+        if count == last:
+            break
+    return offset, count
+
+
+def read_history(path, *, last: Optional[int] = None, since: Optional[float] = None) -> Iterator[dict]:
+    """Yield, oldest first, the last `last` records and/or the records at or after `since`.
+
+    The end of the file is read backwards until the first requested record, and the records
+    are then streamed from there.
+    """
+    offset, _ = find_start(path, last=last, since=since)
+    return iter_records(path, offset)
+
+
+def read_last(path) -> Optional[dict]:
+    """Return the last record of a JSONL file, or None if it is empty."""
+    for _, line in iter_lines_reversed(path):
+        return json.loads(line)
+    return None
@@ -1,19 +1,19 @@
 import asyncio
 from typing import Optional, Union
 
-from .config import LLMConfig
+from .config import ChatConfig
 from .api_client import LLMAPIClient
 
 class LLMInterface:
-    def __init__(self, config: Union[str, LLMConfig, dict], api_client: Optional[LLMAPIClient] = None):
+    def __init__(self, config: Union[str, ChatConfig, dict], api_client: Optional[LLMAPIClient] = None):
         if isinstance(config, str):
             # Treat config as a file path
-            self.config = LLMConfig.from_file(config)
+            self.config = ChatConfig.from_file(config)
         elif isinstance(config, dict):
             # Treat config as a dictionary
-            self.config = LLMConfig.from_dict(config)
+            self.config = ChatConfig.from_dict(config)
         else:
-            # Assume config is an LLMConfig object
+            # Assume config is a ChatConfig object
             self.config = config
 
         if api_client is None:
@@ -41,7 +41,20 @@ class LLMInterface:
         response = await self.api_client.query(
             model=self.config.model,
             messages=context,
+            provider=self.config.provider,
             **self.config.api_parameters
         )
 
         return response
+
+    async def send_messages(self, *user_messages: str) -> list[str]:
+        """
+        Send several independent user messages at once and return their responses in order.
+
+        Args:
+            user_messages (str): The user messages to send to the LLM API.
+
+        Returns:
+            list[str]: The responses from the LLM API.
+        """
+        return list(await asyncio.gather(*(self.send_message(message) for message in user_messages)))
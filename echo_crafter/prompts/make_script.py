@@ -3,15 +3,18 @@
 import argparse
 import os
 import sys
-import re
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 from pathlib import Path
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
 from rich.markdown import Markdown
+from rich.text import Text
 from prompt_toolkit import PromptSession, prompt
 from prompt_toolkit.history import FileHistory
 from echo_crafter.config import LLMConfig
 from echo_crafter.prompts import OpenAIAPI
+from echo_crafter.prompts.response_cache import ResponseCache, openai_embedding
+from echo_crafter.prompts.sections import SectionParser, first_code_block, parse_sections
 from echo_crafter.prompts.templates import (
      PYTHON_BASE_PROMPT,
      SHELL_BASE_PROMPT,
@@ -48,29 +51,42 @@ def extract_sections_from_markdown(markdown_text: str, sections: list[str]) -> d
        extract_sections_from_markdown(markdown_text, sections)
        # Output: {'CODE': 'def hello_world():\n    print("Hello, world!")', 'FILENAME': 'hello.py', 'DESCRIPTION': 'A simple hello world program.'}
     """
-    # Regular expressions for extracting the sections
-    section_patterns = [f"## {section}:\n(.*)\n\n## {sections[i+1]}" for i, section in enumerate(sections[:-1])]
-    section_patterns.append(f"## {sections[-1]}:\n(.*)")
-    # Extracting the content
-    section_contents = [re.search(section_pattern, markdown_text, re.DOTALL) for section_pattern in section_patterns]
-
-    # Preparing the result dictionary
-    result = {
-         section: (section_contents[i].group(1).strip() if section_contents[i] is not None else "") for i, section in enumerate(sections)  # type: ignore
-    }
-
-    return result
+    return parse_sections(markdown_text, sections)
 
 
 def extract_code_block(content):
     """Parse the answer content."""
-    match = re.search(r"```(?:\S+)(.*)```", content, re.DOTALL)
-    if match is not None:
-        return match.group(1).strip()
+    return first_code_block(content)
+
+
+def render_sections(sections: dict):
+    """Render the CODE, FILENAME and DESCRIPTION sections of an answer."""
+    return Group(
+        Text("Code Section:"), Markdown(sections["CODE"]),
+        Text(f"Filename Section: {sections['FILENAME']}"),
+        Text(f"Description Section: {sections['DESCRIPTION']}"),
+    )
+
 
+def stream_answer(api: OpenAIAPI, command: str, console: Console) -> dict:
+    """Render the sections of the answer progressively as it is generated and return them once complete."""
+    parser = SectionParser(["CODE", "FILENAME", "DESCRIPTION"])
+    with Live(render_sections(parser.partial()), console=console, refresh_per_second=8) as live:
+        for delta in api.stream_chat_completion(command):
+            parser.feed(delta)
+            live.update(render_sections(parser.partial()))
+        parser.close()
+        live.update(render_sections(parser.sections))
+    return parser.sections
 
-def main(command: str | None, *, model: str, language: str, temperature: float, max_new_tokens: int):
-    """Main function for the script."""
+
+def main(command: str | None, *, model: str, language: str, temperature: float, max_new_tokens: int, stream: bool = True,
+         cache: bool = True, semantic_cache: bool = False):
+    """Main function for the script.
+
+    Answers are cached, so that repeating a request returns at once without a new completion.
+    With `semantic_cache`, requests similar enough to a cached one are answered from the cache too.
+    """
 
     script_repository = Path(__file__)/"examples"
 
@@ -88,7 +104,8 @@ def main(command: str | None, *, model: str, language: str, temperature: float,
 
     console = Console()
     session = PromptSession(history=FileHistory(LLMConfig['HISTORY_FILE']))
-    api = OpenAIAPI(base_prompt, model=model, max_new_tokens=max_new_tokens, temperature=temperature)
+    response_cache = ResponseCache(LLMConfig['CACHE_FILE'], embed=openai_embedding if semantic_cache else None) if cache else None
+    api = OpenAIAPI(base_prompt, model=model, max_new_tokens=max_new_tokens, temperature=temperature, cache=response_cache)
 
     command = command
     try:
@@ -102,14 +119,18 @@ def main(command: str | None, *, model: str, language: str, temperature: float,
                     console.print("User terminated chat", style="bold red")
                     break
 
-            with console.status("[bold yellow]Waiting for ChatGPT's answer..."):
-                response = api.create_chat_completion(command)
+            if stream:
+                sections = stream_answer(api, command, console)
                 command = None
+            else:
+                with console.status("[bold yellow]Waiting for ChatGPT's answer..."):
+                    response = api.create_chat_completion(command)
+                    command = None
 
-            sections = extract_sections_from_markdown(response, ["CODE", "FILENAME", "DESCRIPTION"])
-            console.print("Code Section:", Markdown(sections["CODE"]))
-            console.print("Filename Section:", sections["FILENAME"])
-            console.print("Description Section:", sections["DESCRIPTION"])
+                sections = extract_sections_from_markdown(response, ["CODE", "FILENAME", "DESCRIPTION"])
+                console.print("Code Section:", Markdown(sections["CODE"]))
+                console.print("Filename Section:", sections["FILENAME"])
+                console.print("Description Section:", sections["DESCRIPTION"])
 
             _fname = sections["FILENAME"]
             fname = _fname if _fname and _fname.endswith(extension) else None
@@ -133,8 +154,11 @@ def main(command: str | None, *, model: str, language: str, temperature: float,
          console.print("User terminated chat", style="bold red")
 
     finally:
-        if api.usage['total_tokens'] > 0:
+        if api.usage['total_tokens'] > 0 or api.cache_hits > 0:
              api.log_session()
+        if response_cache is not None:
+             response_cache.close()
+             console.print("Cache:", response_cache.report(), style="dim")
 
     return None
 
@@ -146,6 +170,10 @@ if __name__ == '__main__':
      parser.add_argument('--language',       type=str,   help='Language to use (python or shell).', default='python')
      parser.add_argument('--temperature',    type=float, help='Sampling temperature to use [floating point number between 0 and 2]', default=0.2)
      parser.add_argument('--max_new_tokens', type=int,   help='Specify an upper bound on number of tokens generated per response.')
+     parser.add_argument('--no_stream',      action='store_true', help='Wait for the whole answer instead of rendering it as it is generated.')
+     parser.add_argument('--no_cache',       action='store_true', help='Always request a new answer instead of reusing cached ones.')
+     parser.add_argument('--semantic_cache', action='store_true', help='Also reuse the cached answers of similar requests, comparing their embeddings.')
 
      args = parser.parse_args()
-     main(args.command, model=args.model, language=args.language, temperature=args.temperature, max_new_tokens=args.max_new_tokens)
+     main(args.command, model=args.model, language=args.language, temperature=args.temperature, max_new_tokens=args.max_new_tokens, stream=not args.no_stream,
+          cache=not args.no_cache, semantic_cache=args.semantic_cache)
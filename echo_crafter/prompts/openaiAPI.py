@@ -2,17 +2,31 @@ import time
 import json
 import sys
 sys.path.append('os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))')
-from openai import OpenAI
 from echo_crafter.config import LLMConfig
+from echo_crafter.utils.http_clients import clients
+from echo_crafter.logger.log_store import LogStore
+from echo_crafter.prompts.response_cache import ResponseCache, context_hash
+from echo_crafter.prompts.context import ConversationContext, make_token_counter
 
 class OpenAIAPI:
     """OpenAI API client."""
 
-    def __init__(self, SYSTEM_MESSAGES, *, model, max_new_tokens=None, temperature=None):
-        """Initialize the OpenAI API client."""
-        self.client = OpenAI(api_key=LLMConfig['API_KEY'])
+    def __init__(self, SYSTEM_MESSAGES, *, model, max_new_tokens=None, temperature=None, cache: ResponseCache | None = None,
+                 max_context_tokens=None, summarize=None):
+        """Initialize the OpenAI API client.
+
+        The system messages are sent with every request, followed by as many of the latest turns
+        as fit in `max_context_tokens` (see `ConversationContext`). When a `cache` is given, answers
+        to requests already made in the same context are taken from it.
+        """
+        self.client = clients.openai()
         self.session_id = None
-        self.messages = SYSTEM_MESSAGES
+        self.context = ConversationContext(
+            SYSTEM_MESSAGES,
+            max_tokens=max_context_tokens or LLMConfig['MAX_CONTEXT_TOKENS'],
+            count_tokens=make_token_counter(model),
+            summarize=summarize,
+        )
         self.temperature = temperature if temperature is not None else 0.4
         self.max_new_tokens = max_new_tokens
         self.model = model
@@ -20,38 +34,117 @@ class OpenAIAPI:
         self.usage = {'completion_tokens': 0, 'prompt_tokens': 0, 'total_tokens': 0}
         self.cost = 0.0
         self._last_finish_reason = None
+        self.cache = cache
+        self.cache_hits = 0
 
+    @property
+    def messages(self):
+        """Return the whole conversation, including the turns no longer sent."""
+        return self.context.transcript
 
-    def create_chat_completion(self, message):
-        """Create a chat completion."""
+    def _make_payload(self, message):
+        """Add the user message to the history and build the request payload."""
         oaimsg_u = {"role": "user", "content": message}
-        self.messages.append(oaimsg_u)
+        self.context.append(oaimsg_u)
 
-        payload = {
+        return {
             "model": self.model,
             "temperature": self.temperature,
-            "messages": self.messages,
+            "messages": self.context.window(),
             "max_tokens": self.max_new_tokens
         }
 
-        response = self.client.chat.completions.create(**payload)
-        self.usage['completion_tokens'] += response.usage.completion_tokens
-        self.usage['prompt_tokens'] += response.usage.prompt_tokens
-        self.usage['total_tokens'] += response.usage.total_tokens
-        self.cost += response.usage.prompt_tokens * LLMConfig['MODELS'][0]['pricing']['input'] / 1_000_000
-        self.cost += response.usage.completion_tokens * LLMConfig['MODELS'][0]['pricing']['output']  / 1_000_000
+    def _add_usage(self, usage):
+        """Add the token usage of a response to the session's usage and cost."""
+        self.usage['completion_tokens'] += usage.completion_tokens
+        self.usage['prompt_tokens'] += usage.prompt_tokens
+        self.usage['total_tokens'] += usage.total_tokens
+        self.cost += usage.prompt_tokens * LLMConfig['MODELS'][0]['pricing']['input'] / 1_000_000
+        self.cost += usage.completion_tokens * LLMConfig['MODELS'][0]['pricing']['output']  / 1_000_000
 
-        content = response.choices[0].message.content
+    def _add_answer(self, content, finish_reason):
+        """Add the assistant's answer to the history."""
         if content:
             oaimsg_a = {"role": "assistant", "content": content}
-            self.messages.append(oaimsg_a)
+            self.context.append(oaimsg_a)
+
+        self._last_finish_reason = finish_reason
+
+    def _cached_answer(self, message):
+        """Look the answer to the message up in the cache, adding both to the history on a hit.
+
+        Returns:
+            The context of the message, used to cache its answer on a miss, and the cached answer if any.
+        """
+        if self.cache is None:
+            return None, None
+        context = context_hash(self.model, self.temperature, self.context.window())
+        content = self.cache.get(context, message)
+        if content is not None:
+            self.cache_hits += 1
+            self.context.append({"role": "user", "content": message})
+            self._add_answer(content, 'stop')
+        return context, content
+
+    def _cache_answer(self, context, message, content, finish_reason):
+        """Cache a complete answer."""
+        if self.cache is not None and content and finish_reason == 'stop':
+            self.cache.put(context, message, content)
+
+    def create_chat_completion(self, message):
+        """Create a chat completion."""
+        context, content = self._cached_answer(message)
+        if content is not None:
+            return content
+
+        payload = self._make_payload(message)
+
+        response = self.client.chat.completions.create(**payload)
+        self._add_usage(response.usage)
 
-        self._last_finish_reason = response.choices[0].finish_reason
+        content = response.choices[0].message.content
+        self._add_answer(content, response.choices[0].finish_reason)
+        self._cache_answer(context, message, content, response.choices[0].finish_reason)
 
         return content
 
+    def stream_chat_completion(self, message):
+        """Create a chat completion and yield its content as it is generated.
+
+        The usage, which is sent in the last chunk of the stream, and the answer are
+        accounted for once the stream is exhausted. A cached answer is yielded at once.
+        """
+        context, content = self._cached_answer(message)
+        if content is not None:
+            yield content
+            return
+
+        payload = self._make_payload(message)
+
+        stream = self.client.chat.completions.create(**payload, stream=True, stream_options={"include_usage": True})
+        deltas = []
+        finish_reason = None
+        for chunk in stream:
+            if chunk.usage is not None:
+                self._add_usage(chunk.usage)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason is not None:
+                finish_reason = choice.finish_reason
+            if choice.delta.content:
+                deltas.append(choice.delta.content)
+                yield choice.delta.content
+
+        content = ''.join(deltas)
+        self._add_answer(content, finish_reason)
+        self._cache_answer(context, message, content, finish_reason)
+
     def log_session(self):
-        """Log the session chat to a file."""
+        """Log the session chat to a file.
+
+        The entry is appended both to the JSONL log and to the indexed log store used for history queries.
+        """
         try:
             log_entry = {
                 "timestamp": self.created,
@@ -60,10 +153,12 @@ class OpenAIAPI:
                 "messages": self.messages,
                 "usage": self.usage,
                 "cost": self.cost,
+                "cache_hits": self.cache_hits,
                 "error": None
             }
             with open(LLMConfig['LOG_FILE'], 'a+') as f:
                 f.write(json.dumps(log_entry) + '\n')
+            LogStore(LLMConfig['LOG_STORE']).append(log_entry, timestamp=self.created)
 
         except Exception as e:
             print(f"Error occurred while logging session: {e}", file=sys.stderr)
@@ -0,0 +1,250 @@
+"""Local cache of chat completion answers, so that repeated requests cost nothing."""
+
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from echo_crafter.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL_SEC = 7 * 24 * 3600
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def normalize_request(request: str) -> str:
+    """Normalize a user request so that trivially different phrasings share a cache entry."""
+    return re.sub(r"\s+", " ", request).strip().rstrip(".!?").lower()
+
+
+def context_hash(model: str, temperature: float, messages: Sequence[dict]) -> str:
+    """Hash everything an answer depends on besides the user request itself.
+
+    Args:
+        model: The name of the model.
+        temperature: The sampling temperature.
+        messages: The messages preceding the request, i.e. the system prompt and any earlier turns.
+    """
+    prompt = json.dumps(list(messages), sort_keys=True, ensure_ascii=False)
+    context = [model, temperature, hashlib.sha256(prompt.encode()).hexdigest()]
+    return hashlib.sha256(json.dumps(context).encode()).hexdigest()
+
+
+def openai_embedding(text: str) -> List[float]:
+    """Embed a text with the OpenAI embeddings endpoint."""
+    from echo_crafter.utils.http_clients import clients
+
+    return clients.openai().embeddings.create(model=EMBEDDING_MODEL, input=text).data[0].embedding
+
+
+class ResponseCache:
+    """A persistent LRU cache of answers with a time to live.
+
+    Answers are looked up by an exact match on the context and the normalized request first.
+    When an `embed` function is given, a miss falls back to the entry of the same context whose
+    request embedding is the most similar to that of the new request, provided their cosine
+    similarity reaches `similarity_threshold`.
+
+    The entries are stored in a JSON file which is only rewritten, atomically, when an answer is
+    added, so lookups never touch the disk. The hit and miss counts are kept in memory and added
+    to those of a small sidecar file on `close`.
+    """
+
+    def __init__(self, path, *,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl: float = DEFAULT_TTL_SEC,
+                 embed: Optional[Callable[[str], List[float]]] = None,
+                 similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        """Load the cache stored at `path`.
+
+        Args:
+            path: The path to the cache file.
+            max_entries: The number of entries above which the least recently used ones are evicted.
+            ttl: The number of seconds after which an entry expires.
+            embed: A function embedding a request, enabling the similarity tier.
+            similarity_threshold: The minimal cosine similarity of a similarity hit.
+        """
+        self.path = Path(path)
+        self.stats_path = self.path.with_name(self.path.stem + '.stats.json')
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.entries: OrderedDict[str, dict] = OrderedDict()
+        self.stats: Dict[str, int] = {'exact_hits': 0, 'similar_hits': 0, 'misses': 0, 'evictions': 0}
+        self._session_stats: Dict[str, int] = dict.fromkeys(self.stats, 0)
+        self._last_embedding = ("", [])
+        self._load()
+
+    @staticmethod
+    def _read_json(path: Path):
+        """Read a JSON file, returning None if it is missing or corrupted."""
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path: Path, data) -> None:
+        """Atomically write a JSON file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.unlink(tmp_path)
+
+    def _load(self) -> None:
+        """Read the cache and statistics files, ignoring missing or corrupted ones."""
+        try:
+            self.entries = OrderedDict(self._read_json(self.path)['entries'])
+        except (KeyError, TypeError, ValueError):
+            pass
+        stats = self._read_json(self.stats_path)
+        if isinstance(stats, dict):
+            self.stats.update({key: value for key, value in stats.items() if key in self.stats})
+
+    def _save(self) -> None:
+        """Atomically write the cache file."""
+        self._write_json(self.path, {'entries': list(self.entries.items())})
+
+    def _count(self, kind: str, n: int = 1) -> None:
+        """Count a lookup outcome or an eviction."""
+        self.stats[kind] += n
+        self._session_stats[kind] += n
+
+    def _embed(self, request: str) -> Optional[List[float]]:
+        """Embed a normalized request, reusing the embedding of the previous call for the same request.
+
+        Returns None if the request could not be embedded, e.g. because of a network error.
+        """
+        if self._last_embedding[0] != request:
+            try:
+                embedding = self.embed(request)  # type: ignore[misc]
+            except Exception as e:
+                logger.warning("Failed to embed the request, skipping the similarity tier: %s", e)
+                return None
+            self._last_embedding = (request, embedding)
+        return self._last_embedding[1]
+
+    @staticmethod
+    def _key(context: str, request: str) -> str:
+        return hashlib.sha256(f"{context}\n{request}".encode()).hexdigest()
+
+    def _evict(self) -> None:
+        """Drop the expired entries, then the least recently used ones in excess."""
+        now = time.time()
+        for key in [key for key, entry in self.entries.items() if entry['expires'] <= now]:
+            del self.entries[key]
+            self._count('evictions')
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self._count('evictions')
+
+    def _most_similar(self, context: str, embedding: List[float]) -> Optional[str]:
+        """Return the key of the entry of the context with the most similar request, if similar enough."""
+        candidates = [(key, entry['embedding']) for key, entry in self.entries.items()
+                      if entry['context'] == context and entry.get('embedding') is not None]
+        if not candidates:
+            return None
+        matrix = np.asarray([vector for _, vector in candidates], dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32)
+        similarities = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(similarities))
+        return candidates[best][0] if similarities[best] >= self.similarity_threshold else None
+
+    def get(self, context: str, request: str) -> Optional[str]:
+        """Return the cached answer to a request in the given context, or None on a miss.
+
+        Expired entries are dropped from memory only; the file is updated by the next `put`.
+        """
+        self._evict()
+        normalized = normalize_request(request)
+        key = self._key(context, normalized)
+        kind = 'exact_hits'
+        if key not in self.entries and self.embed is not None:
+            embedding = self._embed(normalized)
+            if embedding is not None:
+                key = self._most_similar(context, embedding) or key
+                kind = 'similar_hits'
+        entry = self.entries.get(key)
+        if entry is None:
+            self._count('misses')
+            return None
+        self.entries.move_to_end(key)
+        self._count(kind)
+        return entry['content']
+
+    def put(self, context: str, request: str, content: str) -> None:
+        """Cache the answer to a request in the given context."""
+        normalized = normalize_request(request)
+        self.entries[self._key(context, normalized)] = {
+            'context': context,
+            'request': normalized,
+            'content': content,
+            'expires': time.time() + self.ttl,
+            'embedding': self._embed(normalized) if self.embed is not None else None,
+        }
+        self._evict()
+        self._save()
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        self.entries.clear()
+        self.stats = dict.fromkeys(self.stats, 0)
+        self._session_stats = dict.fromkeys(self.stats, 0)
+        self._save()
+        self._write_json(self.stats_path, self.stats)
+
+    def close(self) -> None:
+        """Add the statistics of this session to those of the statistics file.
+
+        The file is read again first, so that concurrent sessions do not overwrite each other's counts.
+        """
+        if not any(self._session_stats.values()):
+            return
+        stats = dict.fromkeys(self.stats, 0)
+        saved = self._read_json(self.stats_path)
+        if isinstance(saved, dict):
+            stats.update({key: value for key, value in saved.items() if key in stats})
+        for key, value in self._session_stats.items():
+            stats[key] += value
+        self._write_json(self.stats_path, stats)
+        self.stats = stats
+        self._session_stats = dict.fromkeys(self.stats, 0)
+
+    def report(self) -> str:
+        """Return a summary of the hits and misses of the cache."""
+        hits = self.stats['exact_hits'] + self.stats['similar_hits']
+        lookups = hits + self.stats['misses']
+        hit_rate = hits / lookups if lookups else 0.0
+        return (f"{len(self.entries)} entries, {lookups} lookups, hit rate {hit_rate:.1%} "
+                f"({self.stats['exact_hits']} exact, {self.stats['similar_hits']} similar, {self.stats['misses']} misses), "
+                f"{self.stats['evictions']} evictions")
+
+
+if __name__ == '__main__':
+    import argparse
+    from echo_crafter.config import LLMConfig
+
+    parser = argparse.ArgumentParser(description='Report on or clear the chat completion cache.')
+    parser.add_argument('--clear', action='store_true', help='Remove all entries.')
+    args = parser.parse_args()
+
+    cache = ResponseCache(LLMConfig['CACHE_FILE'])
+    if args.clear:
+        cache.clear()
+    print(cache.report())
@@ -0,0 +1,207 @@
+"""Incremental tokenizer for the `## SECTION:` headers and code fences of markdown answers."""
+
+from typing import Dict, Iterable, List, Optional
+
+FENCE = "```"
+
+
+def fence_length(stripped: str) -> int:
+    """Return the number of backticks of a code fence line, or 0 if the line is not a fence."""
+    length = len(stripped) - len(stripped.lstrip('`'))
+    return length if length >= len(FENCE) else 0
+
+
+def closes_fence(stripped: str, opening_length: int) -> bool:
+    """Check whether a line closes a fence opened with `opening_length` backticks.
+
+    As in CommonMark, the closing fence has at least as many backticks and no info string, so
+    that a block fenced with four backticks can hold one fenced with three.
+    """
+    length = fence_length(stripped)
+    return length >= opening_length and not stripped[length:].strip()
+
+
+class SectionParser:
+    """Split a markdown answer into named sections in a single pass.
+
+    The answer can be fed in chunks of any size, e.g. as the deltas of a streamed completion
+    arrive. Each character is looked at a bounded number of times, so parsing is linear in the
+    length of the answer. A section closes when the header of another known section makes up
+    a line, or when the answer ends. Headers are recognized inside code fences as well, so that
+    a fence the model forgot to close does not swallow the rest of the answer.
+
+    Example:
+
+        parser = SectionParser(["CODE", "FILENAME", "DESCRIPTION"])
+        for delta in deltas:
+            for name, content in parser.feed(delta).items():
+                print(f"{name} is complete: {content}")
+        parser.close()
+        parser.sections  # {'CODE': '...', 'FILENAME': '...', 'DESCRIPTION': '...'}
+    """
+
+    def __init__(self, sections: Iterable[str]):
+        """Initialize the parser.
+
+        Args:
+            sections: The names of the sections to extract.
+        """
+        self.headers = {f"## {section}:": section for section in sections}
+        self.sections: Dict[str, str] = {section: "" for section in self.headers.values()}
+        self.code_blocks: Dict[str, List[str]] = {section: [] for section in self.headers.values()}
+        self._current: Optional[str] = None
+        self._lines: List[str] = []
+        self._block: Optional[List[str]] = None
+        self._fence_length = 0
+        self._pending: List[str] = []
+        self._closed = False
+
+    def feed(self, chunk: str) -> Dict[str, str]:
+        """Parse the next chunk of the answer and return the sections it closed."""
+        closed = {}
+        start = 0
+        end = chunk.find('\n')
+        while end != -1:
+            self._pending.append(chunk[start:end])
+            line = ''.join(self._pending)
+            self._pending.clear()
+            self._process_line(line, closed)
+            start = end + 1
+            end = chunk.find('\n', start)
+        if start < len(chunk):
+            self._pending.append(chunk[start:])
+        return closed
+
+    def close(self) -> Dict[str, str]:
+        """Signal the end of the answer and return the sections this closed."""
+        closed = {}
+        if self._closed:
+            return closed
+        if self._pending:
+            line = ''.join(self._pending)
+            self._pending.clear()
+            self._process_line(line, closed)
+        self._close_section(closed)
+        self._closed = True
+        return closed
+
+    def partial(self) -> Dict[str, str]:
+        """Return the sections parsed so far, including the content of the one still open."""
+        sections = dict(self.sections)
+        if self._current is not None:
+            lines = self._lines
+            pending = ''.join(self._pending)
+            if pending and not pending.startswith('#'):
+                lines = lines + [pending]
+            sections[self._current] = '\n'.join(lines).strip()
+        return sections
+
+    def _process_line(self, line: str, closed: Dict[str, str]) -> None:
+        """Handle one complete line of the answer."""
+        stripped = line.strip()
+        if stripped in self.headers:
+            self._close_section(closed)
+            self._current = self.headers[stripped]
+            return
+        if self._current is None:
+            return
+        self._lines.append(line)
+        if self._block is None:
+            self._fence_length = fence_length(stripped)
+            if self._fence_length:
+                self._block = []
+        elif closes_fence(stripped, self._fence_length):
+            self.code_blocks[self._current].append('\n'.join(self._block).strip())
+            self._block = None
+        else:
+            self._block.append(line)
+
+    def _close_section(self, closed: Dict[str, str]) -> None:
+        """Store the content of the open section, if any, along with the code block left open in it."""
+        if self._current is None:
+            return
+        if self._block is not None:
+            self.code_blocks[self._current].append('\n'.join(self._block).strip())
+        content = '\n'.join(self._lines).strip()
+        self.sections[self._current] = closed[self._current] = content
+        self._current = None
+        self._lines = []
+        self._block = None
+
+
+def parse_sections(markdown_text: str, sections: Iterable[str]) -> Dict[str, str]:
+    """Extract the given sections of a complete markdown answer."""
+    parser = SectionParser(sections)
+    parser.feed(markdown_text)
+    parser.close()
+    return parser.sections
+
+
+def first_code_block(content: str) -> Optional[str]:
+    """Return the content of the first fenced code block of a markdown text, if it has one.
+
+    A block may also be opened and closed on a single line, e.g. ```python print(1)```, in which
+    case a first word directly following the opening fence is taken as its language, or end with
+    a fence at the end of its last line. An unclosed block is not returned.
+    """
+    lines = iter(content.splitlines())
+    for line in lines:
+        stripped = line.strip()
+        opening_length = fence_length(stripped)
+        if opening_length:
+            break
+    else:
+        return None
+
+    rest = stripped[opening_length:]
+    if FENCE in rest:
+        inline = rest[:rest.index(FENCE)]
+        language, _, code = inline.partition(' ')
+        return (code if language and code.strip() else inline).strip()
+
+    block = []
+    for line in lines:
+        stripped = line.strip()
+        if closes_fence(stripped, opening_length):
+            return '\n'.join(block).strip()
+        if stripped.endswith(FENCE) and opening_length == len(FENCE):
+            block.append(line.rstrip()[:-len(FENCE)])
+            return '\n'.join(block).strip()
+        block.append(line)
+    return None
+
+
+def _benchmark(num_sections: int = 200, lines_per_section: int = 50, chunk_size: int = 16) -> None:
+    """Compare the parser with the former regex extraction on a large multi-section answer."""
+    import re
+    import timeit
+
+    names = [f"SECTION{i}" for i in range(num_sections)]
+    answer = "\n\n".join(
+        f"## {name}:\n```python\n" + "\n".join(f"x_{j} = {j}  # line {j} of {name}" for j in range(lines_per_section)) + "\n```"
+        for name in names
+    )
+
+    def regex_extract():
+        patterns = [f"## {section}:\n(.*)\n\n## {names[i+1]}" for i, section in enumerate(names[:-1])]
+        patterns.append(f"## {names[-1]}:\n(.*)")
+        return [re.search(pattern, answer, re.DOTALL) for pattern in patterns]
+
+    def chunked_parse():
+        parser = SectionParser(names)
+        for i in range(0, len(answer), chunk_size):
+            parser.feed(answer[i:i + chunk_size])
+        parser.close()
+        return parser.sections
+
+    assert parse_sections(answer, names)[names[-1]] == regex_extract()[-1].group(1).strip()  # type: ignore
+    print(f"{len(answer)} characters, {num_sections} sections")
+    for name, func in [("regex", regex_extract), ("parser", lambda: parse_sections(answer, names)),
+                       (f"parser ({chunk_size} char chunks)", chunked_parse)]:
+        number = 3
+        elapsed = timeit.timeit(func, number=number) / number
+        print(f"{name:>28}: {elapsed * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    _benchmark()
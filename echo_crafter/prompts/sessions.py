@@ -1,27 +1,258 @@
+import os
+import struct
 import asyncio
+import itertools
+import tempfile
+from collections import deque
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
 import msgpack
 
+CHUNK_SIZE = 64 * 1024
+COMPACT_MIN_FRAMES = 64
+# A nil frame marks the point where the messages were cleared.
+CLEAR_MARKER = None
+
+
+# Each entry of the index of a session file is the offset of the end of a frame.
+INDEX_ENTRY = struct.Struct('<Q')
+
+
+class FileEndpoint:
+    """A session file, opened as an async context manager for use with `SessionManager`.
+
+    Alongside the file, an index holds the offset of the end of each frame, so that the last
+    frames can be read without decoding the whole file. The index is only trusted when its last
+    entry matches the size of the file; otherwise the file is read from the start.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + '.idx')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        return None
+
+    async def read_chunks(self, chunk_size: int = CHUNK_SIZE):
+        """Yield the content of the file in chunks, or nothing if it does not exist."""
+        try:
+            f = await asyncio.to_thread(open, self.path, 'rb')
+        except FileNotFoundError:
+            return
+        try:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+        finally:
+            f.close()
+
+    async def read(self) -> bytes:
+        """Read the whole file."""
+        return b''.join([chunk async for chunk in self.read_chunks()])
+
+    async def read_tail(self, num_frames: int) -> Optional[Tuple[bytes, int]]:
+        """Read the last `num_frames` frames of the file, seeking with the index.
+
+        Returns:
+            The bytes of the frames and the number of frames preceding them, or None if the index is missing or stale.
+        """
+        def read_tail():
+            try:
+                with open(self.index_path, 'rb') as index, open(self.path, 'rb') as f:
+                    index_size = index.seek(0, os.SEEK_END)
+                    num_entries, remainder = divmod(index_size, INDEX_ENTRY.size)
+                    if num_entries == 0 or remainder:
+                        return None
+                    num_skipped = max(num_entries - num_frames, 0)
+                    # The end of the last skipped frame is the start of the first one read.
+                    index.seek(max(num_skipped - 1, 0) * INDEX_ENTRY.size)
+                    ends = [end for end, in INDEX_ENTRY.iter_unpack(index.read())]
+                    if ends[-1] != os.fstat(f.fileno()).st_size:
+                        return None
+                    start = ends[0] if num_skipped else 0
+                    f.seek(start)
+                    return f.read(ends[-1] - start), num_skipped
+            except FileNotFoundError:
+                return None
+        return await asyncio.to_thread(read_tail)
+
+    def _index_entries(self, offset: int, frame_sizes: Sequence[int]) -> bytes:
+        ends = itertools.accumulate(frame_sizes, initial=offset)
+        next(ends)
+        return b''.join(INDEX_ENTRY.pack(end) for end in ends)
+
+    async def append(self, data: bytes, frame_sizes: Optional[Sequence[int]] = None) -> None:
+        """Append data to the file, indexing its frames if their sizes are given and the index is up to date."""
+        def append():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(data)
+            if frame_sizes is None:
+                self.index_path.unlink(missing_ok=True)
+                return
+            try:
+                with open(self.index_path, 'rb') as index:
+                    index.seek(-INDEX_ENTRY.size, os.SEEK_END)
+                    up_to_date = INDEX_ENTRY.unpack(index.read())[0] == offset
+            except (FileNotFoundError, OSError, struct.error):
+                up_to_date = offset == 0
+            if up_to_date:
+                with open(self.index_path, 'ab') as index:
+                    index.write(self._index_entries(offset, frame_sizes))
+            else:
+                self.index_path.unlink(missing_ok=True)
+        await asyncio.to_thread(append)
+
+    async def write(self, data: bytes, frame_sizes: Optional[Sequence[int]] = None) -> None:
+        """Atomically replace the content of the file, indexing its frames if their sizes are given."""
+        def replace(path: Path, content: bytes):
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+        def write():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.index_path.unlink(missing_ok=True)
+            replace(self.path, data)
+            if frame_sizes is not None:
+                replace(self.index_path, self._index_entries(0, frame_sizes))
+        await asyncio.to_thread(write)
+
+
+def pack_frames(frames) -> Tuple[bytes, List[int]]:
+    """Pack each frame with msgpack, returning the packed data and the size of each frame."""
+    packed = [msgpack.packb(frame, use_bin_type=True) for frame in frames]
+    return b''.join(packed), [len(frame) for frame in packed]
+
+
 class SessionManager:
-    def __init__(self):
+    """The messages of a session, persisted as an append-only sequence of msgpack frames.
+
+    Each message is one frame, so saving only writes the messages added since the last save.
+    Clearing the messages appends a marker frame. The file is compacted, i.e. rewritten with
+    only the live messages, once it holds more than twice as many frames as there are live ones.
+    A manager which has not loaded the file replaces it on its first save, as the frames it
+    would append to are unknown.
+
+    Endpoints are async context managers providing `read_chunks`, `append` and `write`, and
+    optionally `read_tail`, like `FileEndpoint`. Endpoints only providing `read` and `write`
+    get the whole list of messages as a single packed list, the format of earlier versions,
+    which is read as well.
+    """
+
+    def __init__(self, *, compact_min_frames: int = COMPACT_MIN_FRAMES):
         self.messages = []
+        self.compact_min_frames = compact_min_frames
+        self._num_saved = 0
+        self._cleared = False
+        self._num_frames = 0
+        self._num_live = 0
+        self._complete = True
+        self._synced = False
+
+    async def load_messages(self, endpoint, last: Optional[int] = None):
+        """Load the messages of a session, or only its `last` ones.
 
-    async def load_messages(self, endpoint):
+        The file is read in chunks, and only its tail is read when the endpoint has an index.
+        """
         try:
+            messages = deque(maxlen=last)
+            num_frames = num_live = num_skipped = 0
+            seen_clear = False
+            unpacker = msgpack.Unpacker(raw=False)
+
+            def consume(chunk: bytes) -> None:
+                nonlocal num_frames, num_live, seen_clear
+                unpacker.feed(chunk)
+                for frame in unpacker:
+                    num_frames += 1
+                    if frame is CLEAR_MARKER:
+                        messages.clear()
+                        num_live = 0
+                        seen_clear = True
+                    elif isinstance(frame, list):
+                        messages.extend(frame)
+                        num_live += len(frame)
+                    else:
+                        messages.append(frame)
+                        num_live += 1
+
             async with endpoint as e:
-                data = await e.read()
-                if data:
-                    self.messages = msgpack.unpackb(data, raw=False)
+                tail = await e.read_tail(last) if last is not None and hasattr(e, 'read_tail') else None
+                if tail is not None:
+                    data, num_skipped = tail
+                    consume(data)
+                elif hasattr(e, 'read_chunks'):
+                    async for chunk in e.read_chunks():
+                        consume(chunk)
+                else:
+                    consume(await e.read())
+            self.messages = list(messages)
+            self._num_saved = len(self.messages)
+            self._cleared = False
+            self._synced = True
+            self._num_frames, self._num_live = num_skipped + num_frames, num_live
+            self._complete = (num_skipped == 0 or seen_clear) and len(self.messages) == num_live
         except Exception as e:
             print(f"Error loading messages: {e}")
 
     async def save_messages(self, endpoint):
+        """Append the messages added since the last load or save, compacting the file when due.
+
+        The file is replaced instead if it was not loaded, or if the endpoint cannot append.
+        """
         try:
-            data = msgpack.packb(self.messages, use_bin_type=True)
             async with endpoint as e:
-                await e.write(data)
+                if not self._synced or not hasattr(e, 'append'):
+                    await self._replace(e)
+                    return
+                new_messages = self.messages[self._num_saved:]
+                frames = [CLEAR_MARKER] if self._cleared else []
+                frames.extend(new_messages)
+                if not frames:
+                    return
+                data, frame_sizes = pack_frames(frames)
+                if hasattr(e, 'read_tail'):
+                    await e.append(data, frame_sizes=frame_sizes)
+                else:
+                    await e.append(data)
+                self._num_saved = len(self.messages)
+                self._num_frames += len(frames)
+                self._num_live = len(new_messages) if self._cleared else self._num_live + len(new_messages)
+                self._cleared = False
+                if self._complete and self._num_frames > max(self.compact_min_frames, 2 * self._num_live):
+                    await self._replace(e)
         except Exception as e:
             print(f"Error saving messages: {e}")
 
+    async def _replace(self, e):
+        """Replace the content of the opened endpoint with the live messages."""
+        if not self._complete:
+            raise RuntimeError("Cannot rewrite a session loaded with a window of its last messages")
+        if not hasattr(e, 'append'):
+            await e.write(msgpack.packb(self.messages, use_bin_type=True))
+        elif hasattr(e, 'read_tail'):
+            data, frame_sizes = pack_frames(self.messages)
+            await e.write(data, frame_sizes=frame_sizes)
+        else:
+            await e.write(pack_frames(self.messages)[0])
+        self._num_saved = self._num_frames = self._num_live = len(self.messages)
+        self._cleared = False
+        self._synced = True
+
+    async def compact(self, endpoint):
+        """Rewrite the file with one frame per live message.
+
+        Only possible when all the live messages are loaded, i.e. not after a windowed load.
+        """
+        async with endpoint as e:
+            await self._replace(e)
+
     async def add_user_message(self, message):
         self.messages.append({"role": "user", "content": message})
 
@@ -33,3 +264,6 @@ class SessionManager:
 
     async def clear_messages(self):
         self.messages = []
+        self._num_saved = 0
+        self._cleared = True
+        self._complete = True
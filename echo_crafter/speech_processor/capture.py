@@ -0,0 +1,115 @@
+"""A single microphone capture shared by all the consumers of audio frames."""
+
+from threading import Event, Lock, Thread
+from contextlib import ExitStack
+from typing import Dict, Literal
+
+import numpy as np
+
+from echo_crafter.config import Config
+from echo_crafter.logger import setup_logger
+from echo_crafter.speech_processor.resources import engine_pool
+from echo_crafter.speech_processor.utils.ring_buffer import AudioRingBuffer
+
+logger = setup_logger(__name__)
+
+BackpressurePolicy = Literal['drop_oldest', 'block']
+
+
+class AudioCapture:
+    """Read frames from one recorder and publish them to any number of subscribers.
+
+    Each subscriber gets its own ring buffer, hence its own read cursor. When a subscriber
+    falls behind, its `policy` decides whether its oldest unread frames are dropped
+    ('drop_oldest') or the capture waits for it to catch up ('block'), which holds back
+    every other subscriber as well.
+
+    The recorder keeps running for as long as the capture is open, so consumers flush stale
+    audio by clearing their own buffer instead of restarting the recorder.
+
+    Example:
+
+        with AudioCapture() as capture:
+            frames = capture.subscribe()
+            while True:
+                porcupine.process(frames.get())
+    """
+
+    def __init__(self, *, frame_length: int = Config['FRAME_LENGTH']):
+        """Prepare the capture. The recorder is only opened when entering the context."""
+        self.frame_length = frame_length
+        self.recorder = None
+        self._subscribers: Dict[AudioRingBuffer, bool] = {}
+        self._lock = Lock()
+        self._stop_event = Event()
+        self._thread = None
+        self._stack = ExitStack()
+
+    def __enter__(self) -> "AudioCapture":
+        """Open the recorder and start publishing frames."""
+        self.recorder = self._stack.enter_context(engine_pool.lease('recorder', frame_length=self.frame_length))
+        self.recorder.start()
+        self._stop_event.clear()
+        self._thread = Thread(target=self._publish, name="audio_capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop publishing frames and give the recorder back to the engine pool."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            if self._thread.is_alive():
+                logger.error("Failed to stop audio capture thread")
+            self._thread = None
+        self._stack.close()
+
+    @property
+    def sample_rate(self) -> int:
+        """Return the sample rate of the recorder."""
+        return self.recorder.sample_rate
+
+    def is_running(self) -> bool:
+        """Check whether frames are currently being published."""
+        return self._thread is not None and not self._stop_event.is_set()
+
+    def subscribe(self, *,
+                  capacity: int = Config['BUFFER_SIZE'],
+                  policy: BackpressurePolicy = 'drop_oldest') -> AudioRingBuffer:
+        """Return a new ring buffer receiving every frame captured from now on.
+
+        Args:
+            capacity: The number of samples the subscriber's buffer can hold.
+            policy: What to do when the subscriber's buffer is full, see the class docstring.
+        """
+        if policy not in ('drop_oldest', 'block'):
+            raise ValueError(f"Invalid backpressure policy: {policy}")
+        buffer = AudioRingBuffer(capacity=capacity, frame_length=self.frame_length)
+        with self._lock:
+            self._subscribers[buffer] = policy == 'block'
+        return buffer
+
+    def unsubscribe(self, buffer: AudioRingBuffer) -> None:
+        """Stop publishing frames to the given buffer."""
+        with self._lock:
+            self._subscribers.pop(buffer, None)
+
+    def _publish(self) -> None:
+        """Copy each incoming frame into the buffer of every subscriber."""
+        while not self._stop_event.is_set():
+            try:
+                pcm_frame = np.asarray(self.recorder.read(), dtype=np.int16)
+            except Exception as e:
+                logger.exception("Audio capture failed: %s", e, exc_info=True)
+                self._stop_event.set()
+                break
+            with self._lock:
+                subscribers = list(self._subscribers.items())
+            for buffer, block in subscribers:
+                while True:
+                    try:
+                        buffer.put(pcm_frame, block=block, timeout=0.1)
+                        break
+                    except TimeoutError:
+                        if self._stop_event.is_set() or buffer not in self._subscribers:
+                            break
@@ -2,8 +2,12 @@
 
 """Resource management functions for the voice input module."""
 
+import atexit
+import inspect
 from pathlib import Path
-from typing import Generator
+from threading import Lock
+from collections import defaultdict
+from typing import Any, Callable, Dict, Generator, List, Tuple
 from contextlib import contextmanager
 from importlib import import_module
 
@@ -162,13 +166,156 @@ def create_rhino(*, context_file=Config['RHINO_CONTEXT_FILE'], sensitivity=0.7):
             rhino_instance.delete()
 
 @contextmanager
-def create_deepgram():
+def create_deepgram(*, url=""):
     """Create a DeepgramClient instance and yield it. Delete the instance upon exit."""
     deepgram_instance = None
     try:
         deepgram_instance = createDeepgram(
-            access_key=Config['DEEPGRAM_API_KEY']
+            access_key=Config['DEEPGRAM_API_KEY'],
+            url=url
         )
         yield deepgram_instance
     except Exception as e:
         logger.exception("Deepgram failed to initialize: %s", e, exc_info=True)
+
+
+def _make_porcupine(*, wake_word, sensitivity):
+    keyword_path, model_path = porcupine_get_paths(wake_word)
+    return createPorcupine(
+        keyword_paths=[keyword_path],
+        model_path=model_path,
+        sensitivities=[sensitivity],
+        access_key=Config['PICOVOICE_API_KEY']
+    )
+
+
+def _make_rhino(*, context_file=Config['RHINO_CONTEXT_FILE'], sensitivity=0.7):
+    return createRhino(
+        access_key=Config['PICOVOICE_API_KEY'],
+        context_path=context_file,
+        sensitivity=sensitivity
+    )
+
+
+def _make_cobra():
+    return createCobra(access_key=Config['PICOVOICE_API_KEY'])
+
+
+def _make_cheetah(*, model_file=Config['CHEETAH_MODEL_FILE']):
+    return createCheetah(access_key=Config['PICOVOICE_API_KEY'], model_path=model_file)
+
+
+def _make_leopard(*, model_file=Config['LEOPARD_MODEL_FILE']):
+    return createLeopard(access_key=Config['PICOVOICE_API_KEY'], model_path=model_file)
+
+
+def _make_recorder(*, frame_length=Config['FRAME_LENGTH']):
+    return PvRecorder(frame_length=frame_length)
+
+
+def _reset_rhino(rhino):
+    rhino.reset()
+
+
+def _reset_cheetah(cheetah):
+    cheetah.flush()
+
+
+def _reset_recorder(recorder):
+    if recorder.is_recording:
+        recorder.stop()
+
+
+class EnginePool:
+    """A process-wide registry of speech engines and recorders.
+
+    Instances are created on their first lease, and returned to the pool instead of being
+    deleted once the lease is over, after resetting their internal state. Each instance is
+    leased to a single consumer at a time: a lease taken while all matching instances are
+    in use creates a new one. All instances are deleted when the pool is closed, which
+    happens at interpreter exit for the module-level `engine_pool`.
+    """
+
+    _FACTORIES: Dict[str, Tuple[Callable[..., Any], Callable[[Any], None] | None]] = {
+        'porcupine': (_make_porcupine, None),
+        'rhino': (_make_rhino, _reset_rhino),
+        'cobra': (_make_cobra, None),
+        'cheetah': (_make_cheetah, _reset_cheetah),
+        'leopard': (_make_leopard, None),
+        'recorder': (_make_recorder, _reset_recorder),
+    }
+
+    def __init__(self):
+        """Create an empty pool."""
+        self._lock = Lock()
+        self._idle: Dict[Tuple, List[Any]] = defaultdict(list)
+        self._leased: Dict[int, Tuple] = {}
+
+    @contextmanager
+    def lease(self, kind: str, **kwargs):
+        """Lease an instance of the given kind created with the given keyword arguments.
+
+        Args:
+            kind: One of 'porcupine', 'rhino', 'cobra', 'cheetah', 'leopard' or 'recorder'.
+            kwargs: The arguments of the instance, e.g. `model_file` for Cheetah. Omitted
+                arguments take their default values, so that e.g. `lease('recorder')` and
+                `lease('recorder', frame_length=Config['FRAME_LENGTH'])` share instances.
+                Instances created with different arguments are never shared.
+        """
+        if kind not in self._FACTORIES:
+            raise ValueError(f"Unknown engine kind: {kind}")
+        make, reset = self._FACTORIES[kind]
+        arguments = inspect.signature(make).bind(**kwargs)
+        arguments.apply_defaults()
+        key = (kind, tuple(sorted(arguments.arguments.items())))
+
+        with self._lock:
+            instance = self._idle[key].pop() if self._idle[key] else None
+        if instance is None:
+            try:
+                instance = make(*arguments.args, **arguments.kwargs)
+            except Exception as e:
+                logger.exception("Failed to create %s: %s", kind, e, exc_info=True)
+                raise
+            logger.info("Created %s instance", kind)
+        with self._lock:
+            self._leased[id(instance)] = key
+
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                del self._leased[id(instance)]
+            try:
+                if reset is not None:
+                    reset(instance)
+            except Exception as e:
+                logger.exception("Failed to reset %s, deleting it: %s", kind, e, exc_info=True)
+                instance.delete()
+            else:
+                with self._lock:
+                    self._idle[key].append(instance)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return the number of idle and leased instances of each kind."""
+        stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'idle': 0, 'leased': 0})
+        with self._lock:
+            for (kind, _), instances in self._idle.items():
+                stats[kind]['idle'] += len(instances)
+            for kind, _ in self._leased.values():
+                stats[kind]['leased'] += 1
+        return dict(stats)
+
+    def close(self) -> None:
+        """Delete all idle instances."""
+        with self._lock:
+            idle, self._idle = self._idle, defaultdict(list)
+        for (kind, _), instances in idle.items():
+            for instance in instances:
+                if kind == 'recorder':
+                    _reset_recorder(instance)
+                instance.delete()
+
+
+engine_pool = EnginePool()
+atexit.register(engine_pool.close)
@@ -2,16 +2,22 @@
 
 import json
 import httpx
-import struct
+import numpy as np
 import logging
-from typing import List
+from threading import Lock, Thread
+from typing import Callable, List, Optional, Sequence, Union
 from datetime import datetime
 from deepgram import (
     DeepgramClient,
+    DeepgramClientOptions,
+    LiveOptions,
+    LiveTranscriptionEvents,
     PrerecordedOptions,
-    BufferSource,
+    PrerecordedResponse,
 )
+from deepgram.clients.helpers import append_query_params
 from echo_crafter.config import Config
+from echo_crafter.utils.http_clients import clients
 #from echo_crafter.logger import setup_logger
 
 #setup_logger(__name__)
@@ -56,27 +62,127 @@ class Deepgram(DeepgramClient):
 
         return PrerecordedOptions(**options_dict)
 
-    def __init__(self, *, access_key: str):
-        """Initialize the Deepgram client."""
-        super().__init__(api_key=access_key)
+    @staticmethod
+    def make_live_options(config: dict) -> LiveOptions:
+        """Build the options of a live transcription request for our raw 16-bit mono audio."""
+        options_dict = {
+            "model": config['DEEPGRAM_MODEL'],
+            "encoding": "linear16",
+            "sample_rate": config['FRAME_RATE'],
+            "channels": config['CHANNELS'],
+            "interim_results": True,
+        }
+        if config['DEEPGRAM_LANGUAGE'] is not None:
+            options_dict['language'] = config['DEEPGRAM_LANGUAGE']
+        if config['DEEPGRAM_SMART_FORMAT'] is not None:
+            options_dict['smart_format'] = True
+
+        return LiveOptions(**options_dict)
+
+    def __init__(self, *, access_key: str, url: str = ""):
+        """Initialize the Deepgram client.
+
+        Args:
+            access_key: The Deepgram API key.
+            url: The base URL of the API, e.g. that of a local stand-in server. Defaults to Deepgram's.
+        """
+        super().__init__(config=DeepgramClientOptions(api_key=access_key, url=url))
         self.options = self.make_options(Config)
+        self.live_options = self.make_live_options(Config)
 
         logger.info("Initialized Deepgram client with following options")
         logger.info(json.dumps(self.options.to_dict(), indent=4))
 
-    def process(self, pcm: List[int]) -> List[object]:
-        """Transcribe the given audio data."""
-        buffer_data = struct.pack('h' * len(pcm), *pcm)
-        payload: BufferSource = {"buffer": buffer_data}
-        response = self.listen.prerecorded.v("1").transcribe_file(payload, self.options)
+    def process(self, pcm: Union[bytes, Sequence[int]]) -> List[object]:
+        """Transcribe the given audio data, either raw 16-bit PCM bytes or a sequence of samples."""
+        buffer_data = pcm if isinstance(pcm, bytes) else np.asarray(pcm, dtype=np.int16).tobytes()
+        response = self.transcribe_buffer(buffer_data)
         logger.info(response.to_json(indent=4))
         transcript = response.results.channels[0].alternatives[0].transcript
         words = response.results.channels[0].alternatives[0].words
 
         return transcript, words
 
-def create(*, access_key: str):
-    return Deepgram(access_key=access_key)
+    def transcribe_buffer(self, buffer_data: bytes) -> PrerecordedResponse:
+        """Send a prerecorded transcription request through the pooled HTTP client.
+
+        This is what `listen.prerecorded.v("1").transcribe_file` does, except that the SDK
+        opens a new connection for each request.
+        """
+        url = append_query_params(f"{self.config.url}/v1/listen", json.loads(self.options.to_json()))
+        response = clients.http_client('deepgram').post(url, headers=self.config.headers, content=buffer_data)
+        response.raise_for_status()
+        return PrerecordedResponse.from_json(response.text)
+
+    def stream(self, *, on_interim: Optional[Callable[[str], None]] = None) -> "DeepgramStream":
+        """Open a live transcription request which audio frames can be pushed to as they are captured."""
+        stream = DeepgramStream(self.listen.live.v("1"), on_interim=on_interim)
+        stream.start(self.live_options)
+        return stream
+
+
+class DeepgramStream:
+    """A live transcription request.
+
+    Frames are uploaded as soon as they are sent, so that once the utterance is over
+    only the final results remain to be received.
+    """
+
+    def __init__(self, connection, *, on_interim: Optional[Callable[[str], None]] = None):
+        """Register the handlers on the given live client.
+
+        Args:
+            connection: A live client of the Deepgram SDK.
+            on_interim: Called with the transcript of each interim (not final) result.
+        """
+        self.connection = connection
+        self.on_interim = on_interim
+        self.transcripts: List[str] = []
+        self.words: List[object] = []
+        self.closed = False
+        self._lock = Lock()
+        self.connection.on(LiveTranscriptionEvents.Transcript, self._on_transcript)
+        self.connection.on(LiveTranscriptionEvents.Error, self._on_error)
+
+    def _on_transcript(self, _connection, result, **kwargs):
+        """Collect final results and forward interim ones."""
+        alternative = result.channel.alternatives[0]
+        if result.is_final:
+            with self._lock:
+                if alternative.transcript:
+                    self.transcripts.append(alternative.transcript)
+                self.words.extend(alternative.words)
+        elif self.on_interim is not None and alternative.transcript:
+            self.on_interim(alternative.transcript)
+
+    def _on_error(self, _connection, error, **kwargs):
+        """Log errors reported by the live client."""
+        logger.error("Deepgram live transcription error: %s", error)
+
+    def start(self, options: LiveOptions) -> None:
+        """Open the connection."""
+        self.connection.start(options)
+
+    def send(self, pcm: Union[bytes, Sequence[int]]) -> None:
+        """Upload a chunk of audio, either raw 16-bit PCM bytes or a sequence of samples."""
+        self.connection.send(pcm if isinstance(pcm, bytes) else np.asarray(pcm, dtype=np.int16).tobytes())
+
+    def cancel(self) -> None:
+        """Close the request in the background, discarding any further results."""
+        self.on_interim = None
+        self.closed = True
+        Thread(target=self.connection.finish, daemon=True).start()
+
+    def finish(self) -> List[object]:
+        """Close the request once the remaining results are received and return the final transcript and words."""
+        self.closed = True
+        self.connection.finish()
+        with self._lock:
+            return ' '.join(self.transcripts), list(self.words)
+
+
+def create(*, access_key: str, url: str = ""):
+    return Deepgram(access_key=access_key, url=url)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,124 @@
+"""Fixed-capacity ring buffer of int16 audio frames."""
+
+from threading import Condition
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """A preallocated ring buffer of audio frames for one producer and one consumer.
+
+    The storage is a single `(num_frames, frame_length)` int16 array allocated once.
+    The producer copies each incoming frame in place into the next slot, and the
+    consumer receives views into that storage, so no per-frame objects are kept alive.
+
+    Frames which were already read stay in the buffer until they are overwritten, so
+    the consumer can `mark` a position and later `rewind` to it to read them again.
+
+    Note: A view returned by `get` is only valid until the producer wraps around
+    and overwrites its slot, i.e. for `num_frames` subsequent frames. When the
+    consumer falls that far behind, the oldest unread frames are dropped, unless
+    the producer asks to block until there is room with `put(frame, block=True)`.
+    """
+
+    def __init__(self, *, capacity: int, frame_length: int):
+        """Allocate the buffer.
+
+        Args:
+            capacity: The number of samples the buffer can hold. It is rounded down
+                to a whole number of frames.
+            frame_length: The number of samples per frame.
+        """
+        num_frames = capacity // frame_length
+        if num_frames < 1:
+            raise ValueError(f"Capacity of {capacity} samples cannot hold a frame of length {frame_length}")
+        self.frame_length = frame_length
+        self.num_frames = num_frames
+        self._frames = np.zeros((num_frames, frame_length), dtype=np.int16)
+        self._write_index = 0
+        self._read_index = 0
+        self._changed = Condition()
+
+    def __len__(self) -> int:
+        """Return the number of frames written but not yet read."""
+        return self._write_index - self._read_index
+
+    def empty(self) -> bool:
+        """Check whether there are no unread frames."""
+        return self._write_index == self._read_index
+
+    def put(self, frame: Sequence[int], block: bool = False, timeout: Optional[float] = None) -> None:
+        """Copy a frame into the next slot of the buffer.
+
+        Args:
+            frame: The samples of the frame.
+            block: Whether to wait for the consumer to read a frame when the buffer is full,
+                instead of dropping the oldest unread frame.
+            timeout: The maximum number of seconds to wait for when blocking.
+
+        Raises:
+            TimeoutError: If the buffer was still full after `timeout` seconds.
+        """
+        with self._changed:
+            # Keep the slot of the last frame returned by `get` intact while the consumer uses it.
+            if block and not self._changed.wait_for(lambda: len(self) < self.num_frames - 1, timeout):
+                raise TimeoutError("Audio buffer is full")
+            # Write the slot under the lock, so that a concurrent `rewind` or `clear` cannot
+            # expose it to the consumer before it is complete.
+            self._frames[self._write_index % self.num_frames] = frame
+            self._write_index += 1
+            if self._write_index - self._read_index > self.num_frames:
+                self._read_index = self._write_index - self.num_frames
+            self._changed.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> np.ndarray:
+        """Return a view of the oldest unread frame, waiting for one if needed.
+
+        Raises:
+            TimeoutError: If no frame became available within `timeout` seconds.
+        """
+        with self._changed:
+            if not self._changed.wait_for(lambda: self._write_index > self._read_index, timeout):
+                raise TimeoutError("No audio frame available")
+            slot = self._read_index % self.num_frames
+            self._read_index += 1
+            self._changed.notify_all()
+        return self._frames[slot]
+
+    def mark(self) -> int:
+        """Return the position of the next frame to be written."""
+        return self._write_index
+
+    def tell(self) -> int:
+        """Return the position of the next frame to be read."""
+        return self._read_index
+
+    def rewind(self, position: int, *, clamp: bool = False) -> int:
+        """Move the read cursor back to a position previously returned by `mark` or `tell`.
+
+        Args:
+            position: The position to move the read cursor to.
+            clamp: Whether to move to the oldest frame still held when the frames at `position`
+                were overwritten, instead of raising.
+
+        Returns:
+            The new position of the read cursor.
+
+        Raises:
+            ValueError: If the frames since that position have been partially overwritten and `clamp` is not set.
+        """
+        with self._changed:
+            oldest = self._write_index - self.num_frames
+            if position < oldest:
+                if not clamp:
+                    raise ValueError("Frames at the given position were overwritten")
+                position = oldest
+            self._read_index = position
+            return position
+
+    def clear(self) -> None:
+        """Drop all unread frames."""
+        with self._changed:
+            self._read_index = self._write_index
+            self._changed.notify_all()
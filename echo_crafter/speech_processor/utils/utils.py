@@ -1,32 +1,104 @@
 """Utility functions for the echo_crafter module."""
 
 import math
+import numpy as np
 from echo_crafter.config import Config
 
 
+class Endpointer:
+    """Accumulate audio frames into an utterance until the speaker goes silent.
+
+    Frames are copied into a preallocated int16 array as they arrive, and the voice
+    probability of each frame is tracked with hysteresis: a frame counts as voiced above
+    `voice_threshold` and as silent below `silence_threshold`, while frames in between
+    leave the current silence count untouched. The endpoint is reached once
+    `endpoint_duration_sec` worth of consecutive silent frames follow some speech,
+    or when the buffer is full.
+    """
+
+    def __init__(self, *,
+                 vad,
+                 frame_length: int,
+                 sample_rate: int,
+                 endpoint_duration_sec: float = Config['ENDPOINT_DURATION_SEC'],
+                 max_num_samples: int = Config['BUFFER_SIZE'],
+                 voice_threshold: float = 0.12,
+                 silence_threshold: float = 0.1):
+        """Allocate the utterance buffer.
+
+        Args:
+            vad: A voice activity detector whose `process` method returns a voice probability for one frame.
+            frame_length: The number of samples per frame.
+            sample_rate: The sample rate of the audio.
+            endpoint_duration_sec: The duration of silence after speech which ends the utterance.
+            max_num_samples: The maximum length of the utterance, rounded down to a whole number of frames.
+            voice_threshold: The voice probability above which a frame is considered speech.
+            silence_threshold: The voice probability below which a frame is considered silence.
+        """
+        frame_length_sec = frame_length * 2 / sample_rate
+        self.vad = vad
+        self.frame_length = frame_length
+        self.endpoint_num_frames = math.ceil(endpoint_duration_sec / frame_length_sec)
+        self.voice_threshold = voice_threshold
+        self.silence_threshold = silence_threshold
+        self._samples = np.zeros(max_num_samples - max_num_samples % frame_length, dtype=np.int16)
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard the current utterance and voice activity state."""
+        self._num_samples = 0
+        self._num_silent_frames = -1
+        self.is_endpoint = False
+
+    def process(self, frame) -> bool:
+        """Append a frame to the utterance and return whether the endpoint was reached."""
+        if self.is_endpoint:
+            return True
+
+        start = self._num_samples
+        stop = start + self.frame_length
+        self._samples[start:stop] = frame
+        self._num_samples = stop
+
+        voice_probability = self.vad.process(self._samples[start:stop])
+        if self._num_silent_frames >= 0 and voice_probability < self.silence_threshold:
+            self._num_silent_frames += 1
+        elif voice_probability > self.voice_threshold:
+            self._num_silent_frames = 0
+
+        self.is_endpoint = (self._num_silent_frames == self.endpoint_num_frames
+                            or stop == len(self._samples))
+        return self.is_endpoint
+
+    @property
+    def pcm(self) -> np.ndarray:
+        """Return a view of the utterance recorded so far."""
+        return self._samples[:self._num_samples]
+
+    def to_bytes(self) -> bytes:
+        """Return the utterance recorded so far as raw 16-bit PCM."""
+        return self.pcm.tobytes()
+
+
 def get_utterance(*,
                   audio_buffer,
                   vad,
                   frame_length,
                   sample_rate,
-                  stop_event):
-    """Get an utterance from the audio buffer."""
-    utterance = []
-    frame_length_sec = frame_length * 2 / sample_rate
-    endpoint_duration = Config['ENDPOINT_DURATION_SEC']
-    endpoint_num_frames = math.ceil(endpoint_duration / frame_length_sec)
-
-    n_silent_frames = -1
-
-    while True:
-        utterance.extend(audio_buffer.get())
-        voice_probability = vad.process(utterance[-frame_length:])
-
-        if n_silent_frames >= 0 and voice_probability < 0.1:
-            n_silent_frames += 1
-        elif voice_probability > 0.12:
-            n_silent_frames = 0
-
-        if (n_silent_frames == endpoint_num_frames or stop_event()):
-            break
-    return utterance
+                  stop_event,
+                  on_frame=None,
+                  endpointer=None) -> np.ndarray:
+    """Get an utterance from the audio buffer.
+
+    If `on_frame` is given, it is called with each frame as soon as it is read.
+    If `endpointer` is given, the utterance it already holds is continued.
+    """
+    if endpointer is None:
+        endpointer = Endpointer(vad=vad, frame_length=frame_length, sample_rate=sample_rate)
+
+    while not endpointer.is_endpoint and not stop_event():
+        frame = audio_buffer.get()
+        if on_frame is not None:
+            on_frame(frame)
+        endpointer.process(frame)
+    return endpointer.pcm
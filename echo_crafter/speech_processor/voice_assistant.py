@@ -3,8 +3,12 @@
 import time
 import wave
 import json
-import struct
-from resources import (
+import asyncio
+import numpy as np
+from typing import Optional
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from echo_crafter.speech_processor.resources import (
     create_recorder,
     create_porcupine,
     create_rhino,
@@ -13,7 +17,6 @@ from resources import (
     create_deepgram
 )
 from collections import deque
-from queue import Empty, Queue
 from tabulate import tabulate
 from threading import Event, Thread
 from contextlib import ExitStack, contextmanager
@@ -21,10 +24,16 @@ from echo_crafter.commander import intent_handler
 from echo_crafter.logger import setup_logger
 from echo_crafter.config import Config
 from echo_crafter.utils import play_sound
+from echo_crafter.utils.audio_cues import cue_player
+from echo_crafter.utils.http_clients import clients
 from echo_crafter.speech_processor.utils import utils
+from echo_crafter.speech_processor.utils.ring_buffer import AudioRingBuffer
+from echo_crafter.speech_processor.capture import AudioCapture
 
 logger = setup_logger(__name__)
 DEFAULT_WAKE_WORD = "Pierrette"
+# How often a wait for a frame of a shared capture checks whether the voice assistant is stopping.
+FRAME_WAIT_POLL_SEC = 0.1
 
 
 class VoiceAssistant:
@@ -34,19 +43,45 @@ class VoiceAssistant:
                  wake_word=DEFAULT_WAKE_WORD,
                  wake_word_sensitivity=0.8,
                  intent_sensitivity=0.5,
-                 max_utterance_duration_sec=10.0):
+                 max_utterance_duration_sec=10.0,
+                 streaming_transcription=False,
+                 speculative=False,
+                 num_pre_roll_frames=12,
+                 capture: Optional[AudioCapture] = None):
+        """Create the engines of the voice assistant.
+
+        If a running `capture` is given, the voice assistant subscribes to it instead of
+        opening its own recorder, and never restarts the recorder to flush stale audio.
+        """
         self.wake_words = [wake_word]
         self.max_utterance_duration_sec = max_utterance_duration_sec
+        self.streaming_transcription = streaming_transcription
+        self.speculative = speculative
+        self.num_pre_roll_frames = num_pre_roll_frames
         self.wake_word_detected_time =  None
-        self.audio_buffer = Queue()
-        self.intent_handler = intent_handler.create()
+        self.utterance_start = None
+        self._reset_position = 0
+        self._stopping = Event()
+        self._capture_ended = False
+        self._capture_error = None
+        self.capture = capture
+        if capture is None:
+            self.audio_buffer = AudioRingBuffer(capacity=Config['BUFFER_SIZE'], frame_length=Config['FRAME_LENGTH'])
+        else:
+            self.audio_buffer = capture.subscribe()
+        self.intent_handler = intent_handler.create(capture=capture)
+        cue_player.preload(Config['WAKE_WORD_DETECTED_WAV'], Config['INTENT_SUCCESS_WAV'])
         with ExitStack() as stack:
             self.voice_activity_detector = stack.enter_context(create_cobra())
             self.wake_word_detector = stack.enter_context(create_porcupine(wake_word=wake_word, sensitivity=wake_word_sensitivity))
             self.speech_to_intent = stack.enter_context(create_rhino(context_file=Config['RHINO_CONTEXT_FILE'], sensitivity=intent_sensitivity))
             #self.speech_to_text = stack.enter_context(create_leopard(model_file=Config['LEOPARD_MODEL_FILE']))
             self.speech_to_text = stack.enter_context(create_deepgram())
-            self.recorder = stack.enter_context(create_recorder())
+            if capture is None:
+                self.recorder = stack.enter_context(create_recorder())
+            else:
+                self.recorder = capture.recorder
+                stack.callback(capture.unsubscribe, self.audio_buffer)
             self.shut_down = stack.pop_all().close
 
     def run(self):
@@ -55,10 +90,248 @@ class VoiceAssistant:
             while True:
                 self.reset()
                 self.wait_for_wake_word()
-                self.wait_for_intent(save="intent_utterance.wav")
+                if self.speculative:
+                    self.wait_for_intent_speculative(save="intent_utterance.wav")
+                else:
+                    self.wait_for_intent(save="intent_utterance.wav")
         finally:
             self.shut_down()
 
+    async def run_async(self, *, max_workers=2):
+        """Start the voice assistant as a task of the running asyncio event loop.
+
+        A single capture task copies the recorder's frames into the audio buffer for the whole
+        lifetime of the voice assistant, and the wake word, intent and transcription stages are
+        coroutines awaiting those frames. Blocking engine calls run in a bounded executor, so no
+        thread is created per utterance and nothing spins while idle. The voice assistant stops
+        once the recorder stops, and an error reading from the recorder is raised from here.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voice_assistant")
+        self._frame_available = asyncio.Condition()
+        self._capture_ended = False
+        self._capture_error = None
+        self._stopping.clear()
+        capture = None
+        if self.capture is None:
+            self._resume_recorder()
+            capture = asyncio.create_task(self._capture_frames())
+        try:
+            while self.is_recording():
+                self.reset_async()
+                await self.wait_for_wake_word_async()
+                await self.wait_for_intent_async(save="intent_utterance.wav")
+        except RuntimeError as e:
+            # A recorder which merely stopped ends the voice assistant, a failed one is an error.
+            if not self._capture_ended or self._capture_error is not None:
+                raise
+            logger.info("Stopping the voice assistant: %s", e)
+        finally:
+            if capture is not None:
+                capture.cancel()
+                await asyncio.gather(capture, return_exceptions=True)
+            self._stopping.set()
+            self.executor.shutdown(wait=True)
+            if self.capture is None:
+                self._pause_recorder()
+            self.shut_down()
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking call in the executor and wait for its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def _capture_frames(self):
+        """Copy each incoming audio frame into the audio buffer and wake up the waiting stages.
+
+        When the recorder stops or fails, the waiting stages are woken up one last time, so
+        that `next_frame` raises instead of waiting forever.
+        """
+        try:
+            while self.is_recording():
+                pcm_frame = await self._run_blocking(self.recorder.read)
+                self.audio_buffer.put(pcm_frame)
+                async with self._frame_available:
+                    self._frame_available.notify_all()
+        except Exception as e:
+            logger.exception("Failed to read from the recorder: %s", e, exc_info=True)
+            self._capture_error = e
+        finally:
+            self._capture_ended = True
+            async with self._frame_available:
+                self._frame_available.notify_all()
+
+    async def next_frame(self) -> np.ndarray:
+        """Wait for the next unread frame of the audio buffer.
+
+        When subscribed to a shared capture, the frames are published from the capture's
+        thread, so the wait happens in the executor.
+
+        Raises:
+            RuntimeError: If the capture ended, because the recorder stopped or failed, and
+                all its frames were read.
+        """
+        if self.capture is not None:
+            return await self._run_blocking(self._wait_for_captured_frame)
+        async with self._frame_available:
+            await self._frame_available.wait_for(lambda: not self.audio_buffer.empty() or self._capture_ended)
+        if self.audio_buffer.empty():
+            raise RuntimeError("The audio capture ended") from self._capture_error
+        return self.audio_buffer.get()
+
+    def _wait_for_captured_frame(self) -> np.ndarray:
+        """Wait for the next frame of the shared capture, giving up once the voice assistant stops.
+
+        The wait is sliced into timed waits, so that shutting down the executor never hangs
+        on a capture which stopped publishing frames.
+
+        Raises:
+            RuntimeError: If the voice assistant stopped before a frame arrived.
+        """
+        while not self._stopping.is_set():
+            try:
+                return self.audio_buffer.get(timeout=FRAME_WAIT_POLL_SEC)
+            except TimeoutError:
+                continue
+        raise RuntimeError("The voice assistant stopped while waiting for an audio frame")
+
+    def reset_async(self):
+        """Reset the state of the voice assistant without restarting the recorder.
+
+        The capture task keeps filling the audio buffer, so dropping its unread frames is
+        enough to get rid of the audio from the previous command.
+        """
+        self.speech_to_intent.reset()
+        self._flush_audio_buffer()
+        self._reset_position = self.audio_buffer.mark()
+        self.wake_word_detected_time = None
+        self.utterance_start = None
+
+    async def wait_for_wake_word_async(self):
+        """Listen for the wake word amongst the frames of the audio buffer.
+
+        Every frame goes through the audio buffer, so the pre-roll frames (see `wait_for_wake_word`)
+        are still in there when the wake word is detected and the read cursor is simply moved back
+        by `num_pre_roll_frames`.
+        """
+        print("waiting for wake word...")
+        while self.is_recording():
+            pcm_frame = await self.next_frame()
+            keyword = await self._run_blocking(self.wake_word_detector.process, pcm_frame)
+            if keyword >= 0:
+                play_sound(Config['WAKE_WORD_DETECTED_WAV'])
+                self.prewarm_connections()
+                self._rewind_to_pre_roll(self.num_pre_roll_frames)
+                self.wake_word_detected_time = time.time()
+                break
+
+    def _rewind_to_pre_roll(self, num_frames):
+        """Move the read cursor back by `num_frames`, without going past the last reset, and mark the start of the utterance there."""
+        self.utterance_start = max(self.audio_buffer.tell() - num_frames, self._reset_position)
+        self.audio_buffer.rewind(self.utterance_start)
+
+    def _rewind_to_utterance_start(self):
+        """Move the read cursor back to the start of the utterance.
+
+        When the utterance outlasted the audio buffer, its beginning was overwritten, so the
+        transcription starts from the oldest frame still held.
+        """
+        position = self.audio_buffer.rewind(self.utterance_start, clamp=True)
+        if position != self.utterance_start:
+            logger.warning("The first %d frames of the utterance were overwritten", position - self.utterance_start)
+            self.utterance_start = position
+
+    async def wait_for_intent_async(self, *, save=None):
+        """Infer the intent from the frames of the audio buffer.
+
+        See `wait_for_intent`, or `wait_for_intent_speculative` in speculative mode.
+        """
+        print("waiting for intent...")
+        endpointer = stream = None
+        if self.speculative:
+            endpointer = utils.Endpointer(
+                vad=self.voice_activity_detector,
+                frame_length=self.recorder.frame_length,
+                sample_rate=self.recorder.sample_rate
+            )
+            if self.streaming_transcription:
+                stream = await self._run_blocking(self.speech_to_text.stream, on_interim=print)
+
+        try:
+            while self.is_recording():
+                pcm_frame = await self.next_frame()
+                if endpointer is not None:
+                    await self._run_blocking(self._feed_transcription, pcm_frame, endpointer, stream)
+
+                if await self._run_blocking(self.speech_to_intent.process, pcm_frame):
+                    inference = self.speech_to_intent.get_inference()
+                    if inference.is_understood:
+                        if stream is not None:
+                            stream.cancel()
+                        print(json.dumps(inference, indent=2))
+                        play_sound(Config['INTENT_SUCCESS_WAV'])
+                        await self._run_blocking(self.intent_handler, intent=inference.intent, slots=inference.slots)
+                    else:
+                        print("Intent not understood, transcribing...")
+                        if endpointer is None:
+                            self._rewind_to_utterance_start()
+                        await self.transcribe_utterance_async(save=save, endpointer=endpointer, stream=stream)
+                    break
+        finally:
+            # The recorder stopped, or the wait failed or was cancelled, before the stream was closed.
+            if stream is not None and not stream.closed:
+                stream.cancel()
+
+    async def transcribe_utterance_async(self, *, save=None, endpointer=None, stream=None):
+        """Transcribe the frames of the audio buffer until the end of the user's utterance.
+
+        See `transcribe_utterance`.
+        """
+        if endpointer is None:
+            endpointer = utils.Endpointer(
+                vad=self.voice_activity_detector,
+                frame_length=self.recorder.frame_length,
+                sample_rate=self.recorder.sample_rate
+            )
+            if self.streaming_transcription:
+                stream = await self._run_blocking(self.speech_to_text.stream, on_interim=print)
+
+        while not endpointer.is_endpoint and not self.is_utterance_over():
+            pcm_frame = await self.next_frame()
+            await self._run_blocking(self._feed_transcription, pcm_frame, endpointer, stream)
+
+        if stream is not None:
+            transcript, words = await self._run_blocking(stream.finish)
+        else:
+            transcript, words = await self._run_blocking(self.speech_to_text.process, endpointer.to_bytes())
+        print("Got transcription...")
+        if save:
+            self.save_utterance(endpointer.pcm, save)
+        self.handle_transcription_dg(transcript, words)
+
+    @staticmethod
+    def _feed_transcription(pcm_frame, endpointer, stream):
+        """Feed a frame to the endpointer and upload it to the live transcription request, if any."""
+        if stream is not None:
+            stream.send(pcm_frame)
+        endpointer.process(pcm_frame)
+
+    def prewarm_connections(self):
+        """Open the connections to the transcription and LLM services in the background.
+
+        This is done as soon as the wake word is detected, so that a request made for the
+        upcoming command does not pay for the TCP and TLS handshakes.
+        """
+        clients.prewarm('deepgram', base_url=self.speech_to_text.config.url)
+        clients.prewarm('openai')
+
+    def is_utterance_over(self):
+        """Check whether the utterance exceeded its maximum duration or no more audio will come in."""
+        return bool(
+            (self.wake_word_detected_time and
+             time.time() - self.wake_word_detected_time > self.max_utterance_duration_sec) or
+            self.audio_buffer.empty() and not self.is_recording()
+        )
+
     def is_recording(self):
         """Check whether the voice assistant is currently recording."""
         return self.recorder.is_recording
@@ -67,10 +340,11 @@ class VoiceAssistant:
         """Compute the frame length in seconds in terms of the frame length and the sample rate."""
         return self.recorder.frame_length * 2 / self.recorder.sample_rate
 
-    def wait_for_wake_word(self, num_frames_to_keep: int = 12):
+    def wait_for_wake_word(self, num_frames_to_keep: Optional[int] = None):
         """Listen for the wake word amongst the incoming audio frames.
 
         Args: num_frames_to_keep: The number of trailing frames to add to the buffer once the wake word is detected.
+              Defaults to the `num_pre_roll_frames` the voice assistant was created with.
               This is done in order to not have a gap within the sequence of frames between a "wake-word-detected" event
               and the beginning of the "intent-inference" step.
 
@@ -78,18 +352,32 @@ class VoiceAssistant:
         16kHz sample rate, this corresponds to 10 frames. Suppose it takes the wake-word detection engine about 300ms to detect a spoken wake-word. Then
         we the detection will only happen about 5 frames after the wake-word was spoken. Those frames will be lost, unless we save them and prepend them
         to the audio buffer for the next processing step.
+
+        The position of the first of those frames in the audio buffer is remembered as the start of
+        the utterance, see `wait_for_intent`. When subscribed to a shared capture, every frame already
+        goes through the audio buffer and the read cursor is simply moved back instead.
         """
+        if num_frames_to_keep is None:
+            num_frames_to_keep = self.num_pre_roll_frames
         _buffer = deque(maxlen=num_frames_to_keep)
         print("waiting for wake word...")
         while self.is_recording():
-            pcm_frame = self.recorder.read()
-            _buffer.append(pcm_frame)
+            if self.capture is not None:
+                pcm_frame = self.audio_buffer.get()
+            else:
+                pcm_frame = self.recorder.read()
+                _buffer.append(pcm_frame)
 
             keyword = self.wake_word_detector.process(pcm_frame)
             if keyword >= 0:
                 play_sound(Config['WAKE_WORD_DETECTED_WAV'])
-                for frame in _buffer:
-                    self.audio_buffer.put_nowait(frame)
+                self.prewarm_connections()
+                if self.capture is not None:
+                    self._rewind_to_pre_roll(num_frames_to_keep)
+                else:
+                    self.utterance_start = self.audio_buffer.mark()
+                    for frame in _buffer:
+                        self.audio_buffer.put(frame)
                 self.wake_word_detected_time = time.time()
                 break
 
@@ -98,8 +386,9 @@ class VoiceAssistant:
 
         In a loop, we process the incoming audio frames (from the audio buffer) with our speech-to-intent engine.
         Once we get an inference, we check if it is understood. If it is, we handle the intent and slots.
-        If not, we transcribe the audio until the end of the user's utterance and handle the transcription
-        which is sent to the transcription handler.
+        If not, we rewind the audio buffer to the start of the utterance, so that the frames already consumed
+        by the speech-to-intent engine are not lost, then transcribe the audio until the end of the user's
+        utterance and handle the transcription which is sent to the transcription handler.
         """
         print("waiting for intent...")
         with self.audio_buffering():
@@ -114,38 +403,102 @@ class VoiceAssistant:
                         self.intent_handler(intent=inference.intent, slots=inference.slots)
                     else:
                         print("Intent not understood, transcribing...")
-                        stop_event = lambda: (
-                            (self.wake_word_detected_time and
-                            time.time() - self.wake_word_detected_time > self.max_utterance_duration_sec) or
-                            self.audio_buffer.empty() and not self.is_recording()
-                        )
-                        utterance = utils.get_utterance(
-                            audio_buffer=self.audio_buffer,
-                            vad=self.voice_activity_detector,
-                            frame_length=self.recorder.frame_length,
-                            sample_rate=self.recorder.sample_rate,
-                            stop_event=stop_event
-                        )
-                        transcript, words = self.speech_to_text.process(utterance)
-                        print("Got transcription...")
-                        if save:
-                            self.save_utterance(utterance, save)
-                        self.handle_transcription_dg(transcript, words)
+                        self._rewind_to_utterance_start()
+                        self.transcribe_utterance(save=save)
                     break
 
+    def wait_for_intent_speculative(self, *, save=None):
+        """Infer the intent while speculatively transcribing the same audio frames.
+
+        Each incoming frame is fed both to the speech-to-intent engine and to an endpointer
+        (and, in streaming mode, uploaded to a live transcription request). If the intent
+        is understood, the transcription is cancelled. If not, the transcription simply
+        carries on from where it is, so the user does not wait for the speech-to-intent
+        engine's decision on top of the transcription.
+        """
+        print("waiting for intent (speculative)...")
+        endpointer = utils.Endpointer(
+            vad=self.voice_activity_detector,
+            frame_length=self.recorder.frame_length,
+            sample_rate=self.recorder.sample_rate
+        )
+        stream = self.speech_to_text.stream(on_interim=print) if self.streaming_transcription else None
+        try:
+            with self.audio_buffering():
+                while self.is_recording():
+                    pcm_frame = self.audio_buffer.get()
+                    if stream is not None:
+                        stream.send(pcm_frame)
+                    endpointer.process(pcm_frame)
+
+                    if self.speech_to_intent.process(pcm_frame):
+                        inference = self.speech_to_intent.get_inference()
+                        if inference.is_understood:
+                            if stream is not None:
+                                stream.cancel()
+                            print(json.dumps(inference, indent=2))
+                            play_sound(Config['INTENT_SUCCESS_WAV'])
+                            self.intent_handler(intent=inference.intent, slots=inference.slots)
+                        else:
+                            print("Intent not understood, finishing transcription...")
+                            self.transcribe_utterance(save=save, endpointer=endpointer, stream=stream)
+                        break
+        finally:
+            # The recorder stopped, or the wait failed, before the stream was closed.
+            if stream is not None and not stream.closed:
+                stream.cancel()
+
+    def transcribe_utterance(self, *, save=None, endpointer=None, stream=None):
+        """Transcribe the incoming audio frames until the end of the user's utterance.
+
+        In streaming mode, a live transcription request is opened right away and each frame
+        is uploaded as soon as it is read, so that only the final results remain to be
+        received once the endpoint is detected. Otherwise the whole utterance is sent
+        in a single prerecorded request after the endpoint.
+
+        Args:
+            save: The path of a WAV file to save the utterance to.
+            endpointer: An endpointer already holding the beginning of the utterance, which is continued.
+            stream: The live transcription request the beginning of the utterance was already sent to, if any.
+        """
+        if endpointer is None and self.streaming_transcription:
+            stream = self.speech_to_text.stream(on_interim=print)
+        utterance = utils.get_utterance(
+            audio_buffer=self.audio_buffer,
+            vad=self.voice_activity_detector,
+            frame_length=self.recorder.frame_length,
+            sample_rate=self.recorder.sample_rate,
+            stop_event=self.is_utterance_over,
+            on_frame=stream.send if stream is not None else None,
+            endpointer=endpointer
+        )
+        if stream is not None:
+            transcript, words = stream.finish()
+        else:
+            transcript, words = self.speech_to_text.process(utterance.tobytes())
+        print("Got transcription...")
+        if save:
+            self.save_utterance(utterance, save)
+        self.handle_transcription_dg(transcript, words)
+
     @contextmanager
     def audio_buffering(self):
         """Buffer incoming audio frames in a separate thread.
 
         This is useful for processing audio frames from a buffer and backtracking to previous
         frames in case we want to (e.g. in case of a failed intent inference).
+        When subscribed to a shared capture, the buffer is already being filled.
         """
+        if self.capture is not None:
+            yield
+            return
+
         stop_event = Event()
 
         def _do_buffer_audio():
-            """Put each incoming audio frame onto the audio buffer queue."""
+            """Copy each incoming audio frame into the audio ring buffer."""
             while not stop_event.is_set():
-                self.audio_buffer.put_nowait(self.recorder.read())
+                self.audio_buffer.put(self.recorder.read())
 
         t = Thread(target=_do_buffer_audio)
         try:
@@ -166,20 +519,24 @@ class VoiceAssistant:
         the speech processor's current state.
         """
         self.speech_to_intent.reset()
-        self._pause_recorder()
-        self._flush_audio_buffer()
-        self._resume_recorder()
+        if self.capture is None:
+            self._pause_recorder()
+            self._flush_audio_buffer()
+            self._resume_recorder()
+        else:
+            self._flush_audio_buffer()
+        self._reset_position = self.audio_buffer.mark()
         self.wake_word_detected_time = None
+        self.utterance_start = None
 
     def _pause_recorder(self):
         """Pause the recorder.
 
         Note: When pausing and resuming the recorder, its internal buffer gets flushed.
+        Stopping the recorder is synchronous, so there is nothing to wait for afterwards.
         """
         if self.is_recording():
             self.recorder.stop()
-        while self.is_recording():
-            pass
 
     def _resume_recorder(self):
         """Resume the recorder.
@@ -191,18 +548,17 @@ class VoiceAssistant:
 
     def _flush_audio_buffer(self):
         """Flush the audio buffer."""
-        self.audio_buffer.queue.clear()
+        self.audio_buffer.clear()
 
-    def save_utterance(self, utterance: list[int], file_path: str) -> None:
+    def save_utterance(self, utterance: np.ndarray, file_path: str) -> None:
         """Save the utterance to a WAV file.
 
-        Note: The utterance is a list of regular integers, but the format at which we sample
-        audio and save it to the WAV file is as a sequence of signed 16-bit integers.
-        Therefore, we need to pack them two at a time before writing them to the WAV file.
+        Note: The utterance is already a contiguous array of signed 16-bit integers,
+        which is the sample format of the WAV file, so its bytes are written as is.
         """
         with wave.open(file_path, 'wb') as wf:
             wf.setparams((1, 2, 16000, 512, "NONE", "NONE"))
-            wf.writeframes(struct.pack("h" * len(utterance), *utterance))
+            wf.writeframes(utterance.tobytes())
 
     def handle_transcription_pv(self, transcript, words):
         """Handle a transcription for the speech that was not recognized by the speech-to-intent engine.
@@ -221,5 +577,21 @@ class VoiceAssistant:
                        floatfmt='.2f'))
 
 if __name__ == "__main__":
-    assistant = VoiceAssistant()
-    assistant.run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the voice assistant.")
+    parser.add_argument("--asyncio", action="store_true", help="Run on an asyncio event loop.")
+    parser.add_argument("--speculative", action="store_true", help="Transcribe while inferring the intent.")
+    parser.add_argument("--streaming", action="store_true", help="Stream the audio to the transcription service.")
+    parser.add_argument("--shared_capture", action="store_true", help="Read audio from a shared capture.")
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        capture = stack.enter_context(AudioCapture()) if args.shared_capture else None
+        assistant = VoiceAssistant(speculative=args.speculative,
+                                   streaming_transcription=args.streaming,
+                                   capture=capture)
+        if args.asyncio:
+            asyncio.run(assistant.run_async())
+        else:
+            assistant.run()
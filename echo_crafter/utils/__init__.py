@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
 def play_sound(wav_file):
-    """Play a sound file."""
-    import subprocess
-    subprocess.Popen(["aplay", "-q", wav_file])
+    """Play a sound file without blocking, from memory once it has been loaded (see `CuePlayer`)."""
+    from .audio_cues import cue_player
+    cue_player.play(wav_file)
@@ -0,0 +1,132 @@
+"""Play short audio cues from memory through a persistent output stream."""
+
+import atexit
+import wave
+import subprocess
+from importlib.util import find_spec
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from echo_crafter.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Number of frames per callback of the output stream, i.e. about 6ms at 44.1kHz,
+# well under the 32ms of an audio frame of the Picovoice engines.
+BLOCK_SIZE = 256
+
+
+def load_wav(path) -> tuple:
+    """Decode a 16-bit PCM WAV file.
+
+    Returns:
+        The samples as an int16 array of shape (num_frames, num_channels), and the sample rate.
+    """
+    with wave.open(str(path), 'rb') as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"Only 16-bit WAV files are supported: {path}")
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        return pcm.reshape(-1, f.getnchannels()), f.getframerate()
+
+
+def convert(pcm: np.ndarray, sample_rate: int, *, to_sample_rate: int, to_channels: int) -> np.ndarray:
+    """Resample and remix the samples of a cue to the format of the output stream."""
+    if sample_rate != to_sample_rate:
+        num_frames = round(len(pcm) * to_sample_rate / sample_rate)
+        positions = np.linspace(0, len(pcm) - 1, num_frames)
+        pcm = np.stack([np.interp(positions, np.arange(len(pcm)), pcm[:, c]) for c in range(pcm.shape[1])], axis=1)
+    if pcm.shape[1] != to_channels:
+        pcm = np.repeat(pcm.mean(axis=1, keepdims=True), to_channels, axis=1)
+    return pcm.astype(np.int16)
+
+
+class CuePlayer:
+    """Play audio cues without blocking the caller.
+
+    The cues are decoded once and kept in memory. With `sounddevice` installed, they are mixed
+    into a single output stream which is opened on first use and stays open, so that starting
+    a cue only takes effect at the next block of the stream. A cue which is already playing is
+    not started again, while different cues overlap. Without `sounddevice`, cues are played
+    with `aplay`, one process per cue.
+    """
+
+    def __init__(self, *, block_size: int = BLOCK_SIZE):
+        """Initialize the player. The output stream takes the format of the first cue."""
+        self.block_size = block_size
+        self._cues: Dict[str, np.ndarray] = {}
+        self._playing: List[list] = []
+        self._lock = Lock()
+        self._stream = None
+        self._sample_rate: Optional[int] = None
+        self._channels: Optional[int] = None
+        self._use_stream = find_spec('sounddevice') is not None
+
+    def _open_stream(self, sample_rate: int, channels: int) -> None:
+        """Open the output stream."""
+        import sounddevice
+
+        self._sample_rate, self._channels = sample_rate, channels
+        self._stream = sounddevice.OutputStream(
+            samplerate=sample_rate, channels=channels, dtype='int16',
+            blocksize=self.block_size, latency='low', callback=self._mix,
+        )
+        self._stream.start()
+
+    def preload(self, *paths) -> None:
+        """Decode the given WAV files and open the output stream ahead of their first use."""
+        for path in paths:
+            key = str(Path(path).resolve())
+            if key in self._cues:
+                continue
+            try:
+                pcm, sample_rate = load_wav(path)
+            except (OSError, EOFError, wave.Error, ValueError) as e:
+                logger.warning("Could not load the audio cue %s: %s", path, e)
+                continue
+            if self._use_stream:
+                try:
+                    if self._stream is None:
+                        self._open_stream(sample_rate, pcm.shape[1])
+                    pcm = convert(pcm, sample_rate, to_sample_rate=self._sample_rate, to_channels=self._channels)  # type: ignore[arg-type]
+                except Exception as e:
+                    logger.warning("Could not open the audio output stream, falling back to aplay: %s", e)
+                    self._use_stream = False
+            self._cues[key] = pcm
+
+    def _mix(self, outdata, frames, time, status) -> None:
+        """Fill the next block of the output stream with the playing cues."""
+        mix = np.zeros((frames, outdata.shape[1]), dtype=np.int32)
+        with self._lock:
+            for entry in self._playing:
+                pcm, position = entry
+                chunk = pcm[position:position + frames]
+                mix[:len(chunk)] += chunk
+                entry[1] = position + frames
+            self._playing = [entry for entry in self._playing if entry[1] < len(entry[0])]
+        outdata[:] = np.clip(mix, -32768, 32767)
+
+    def play(self, path) -> None:
+        """Start playing a cue, decoding it first if it was not preloaded."""
+        key = str(Path(path).resolve())
+        if key not in self._cues:
+            self.preload(path)
+        if not self._use_stream or key not in self._cues:
+            subprocess.Popen(["aplay", "-q", str(path)])
+            return
+        pcm = self._cues[key]
+        with self._lock:
+            if not any(entry[0] is pcm for entry in self._playing):
+                self._playing.append([pcm, 0])
+
+    def close(self) -> None:
+        """Close the output stream."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+cue_player = CuePlayer()
+atexit.register(cue_player.close)
@@ -0,0 +1,152 @@
+"""Process-wide HTTP clients shared by the Deepgram, OpenAI and Anthropic calls."""
+
+import atexit
+import time
+import weakref
+from threading import Lock
+from collections import defaultdict
+from importlib.util import find_spec
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import httpx
+
+BASE_URLS = {
+    'deepgram': "https://api.deepgram.com",
+    'openai': "https://api.openai.com",
+    'anthropic': "https://api.anthropic.com",
+}
+
+KEEPALIVE_EXPIRY_SEC = 120.0
+MAX_CONNECTIONS = 10
+
+
+def client_options() -> dict:
+    """Get the connection pooling options shared by the sync and async HTTP clients."""
+    return {
+        'http2': find_spec('h2') is not None,
+        'limits': httpx.Limits(max_connections=MAX_CONNECTIONS,
+                               max_keepalive_connections=MAX_CONNECTIONS,
+                               keepalive_expiry=KEEPALIVE_EXPIRY_SEC),
+        'timeout': httpx.Timeout(60.0, connect=10.0),
+    }
+
+
+class ClientRegistry:
+    """Hold one pooled HTTP client per provider for the lifetime of the process.
+
+    Every client keeps its connections alive, with their TLS sessions, between requests, and
+    uses HTTP/2 when the `h2` package is installed. `prewarm` opens the connections ahead of
+    time, e.g. right after the wake word is detected, so that the first request does not pay
+    for the TCP and TLS handshakes.
+
+    Requests are counted per provider, except for the prewarm ones, which are tagged with the
+    `prewarm` request extension. Connections are told apart by the `network_stream` response
+    extension: a stream seen for the first time is a new connection, otherwise a reused one.
+    """
+
+    def __init__(self):
+        """Create an empty registry. Clients are created on first use."""
+        self._lock = Lock()
+        self._http_clients: Dict[str, httpx.Client] = {}
+        self._sdk_clients: Dict[str, object] = {}
+        self._metrics: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'requests': 0, 'responses': 0, 'errors': 0, 'prewarms': 0, 'total_elapsed_sec': 0.0,
+                     'connections_opened': 0, 'connections_reused': 0}
+        )
+        self._streams: Dict[str, weakref.WeakSet] = defaultdict(weakref.WeakSet)
+        self._executor = ThreadPoolExecutor(max_workers=len(BASE_URLS), thread_name_prefix="http_prewarm")
+
+    def http_client(self, provider: str) -> httpx.Client:
+        """Get the pooled HTTP client of the given provider."""
+        with self._lock:
+            if provider not in self._http_clients:
+                metrics, streams = self._metrics[provider], self._streams[provider]
+
+                def on_request(request):
+                    if not request.extensions.get('prewarm'):
+                        metrics['requests'] += 1
+                        request.extensions['start_time'] = time.monotonic()
+
+                def on_response(response):
+                    stream = response.extensions.get('network_stream')
+                    if stream is not None:
+                        with self._lock:
+                            reused = stream in streams
+                            streams.add(stream)
+                        metrics['connections_reused' if reused else 'connections_opened'] += 1
+                    if response.request.extensions.get('prewarm'):
+                        return
+                    metrics['responses'] += 1
+                    if response.status_code >= 400:
+                        metrics['errors'] += 1
+                    start_time = response.request.extensions.get('start_time')
+                    if start_time is not None:
+                        metrics['total_elapsed_sec'] += time.monotonic() - start_time
+
+                self._http_clients[provider] = httpx.Client(
+                    **client_options(),
+                    event_hooks={'request': [on_request], 'response': [on_response]},
+                )
+            return self._http_clients[provider]
+
+    def openai(self):
+        """Get the OpenAI client, sending its requests through the pooled HTTP client."""
+        from openai import OpenAI
+        from echo_crafter.config import LLMConfig
+
+        http_client = self.http_client('openai')
+        with self._lock:
+            if 'openai' not in self._sdk_clients:
+                self._sdk_clients['openai'] = OpenAI(api_key=LLMConfig['API_KEY'], http_client=http_client)
+            return self._sdk_clients['openai']
+
+    def anthropic(self):
+        """Get the Anthropic client, sending its requests through the pooled HTTP client."""
+        from anthropic import Anthropic
+
+        http_client = self.http_client('anthropic')
+        with self._lock:
+            if 'anthropic' not in self._sdk_clients:
+                self._sdk_clients['anthropic'] = Anthropic(http_client=http_client)
+            return self._sdk_clients['anthropic']
+
+    def _connect(self, provider: str, url: str) -> None:
+        """Open a connection to the given url, ignoring the response and any error."""
+        try:
+            self.http_client(provider).head(url, extensions={'prewarm': True})
+            self._metrics[provider]['prewarms'] += 1
+        except httpx.HTTPError:
+            pass
+
+    def prewarm(self, *providers: str, base_url: str = "") -> None:
+        """Open connections to the given providers in the background.
+
+        Args:
+            providers: The providers to connect to. Defaults to all of them.
+            base_url: Connect to this url instead of the provider's, e.g. for a local stand-in server.
+        """
+        for provider in providers or BASE_URLS:
+            self._executor.submit(self._connect, provider, base_url or BASE_URLS[provider])
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Return the request and connection counters of each provider along with their number of open connections."""
+        with self._lock:
+            metrics = {provider: dict(values) for provider, values in self._metrics.items()}
+            for provider, streams in self._streams.items():
+                sockets = [stream.get_extra_info('socket') for stream in list(streams)]
+                metrics[provider]['connections'] = sum(sock is not None and sock.fileno() != -1 for sock in sockets)
+        return metrics
+
+    def close(self) -> None:
+        """Close all connections."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            http_clients, self._http_clients = self._http_clients, {}
+            self._sdk_clients.clear()
+        for client in http_clients.values():
+            client.close()
+
+
+clients = ClientRegistry()
+atexit.register(clients.close)
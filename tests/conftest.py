@@ -0,0 +1,80 @@
+import os
+import json
+import tempfile
+import threading
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+# Keep the log records of the modules under test out of the working directory.
+os.environ.setdefault('EC_LOG_DIR', tempfile.mkdtemp(prefix='echo_crafter_tests_'))
+
+
+def load_module(name: str, relative_path: str):
+    """Load a module of the package by path, without importing its package.
+
+    Importing `echo_crafter.prompts` pulls in the OpenAI client, which the modules under test do not need.
+    """
+    spec = importlib.util.spec_from_file_location(name, Path(__file__).parent.parent / relative_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ReplayServer:
+    """A local stand-in for a streaming websocket API, replaying canned JSON responses.
+
+    One of the `on_audio` responses is sent for each binary frame received, in order, and the
+    `on_close` ones once the client sends a text message, e.g. Deepgram's CloseStream, after
+    which the connection is closed.
+    """
+
+    def __init__(self, on_audio, on_close):
+        from websockets.sync.server import serve
+
+        self.on_audio = list(on_audio)
+        self.on_close = list(on_close)
+        self.received = []
+        self.path = None
+        self._server = serve(self._handle, '127.0.0.1', 0)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def _handle(self, connection) -> None:
+        self.path = connection.request.path
+        pending = iter(self.on_audio)
+        for message in connection:
+            if isinstance(message, bytes):
+                self.received.append(message)
+                response = next(pending, None)
+                if response is not None:
+                    connection.send(json.dumps(response))
+            else:
+                for response in self.on_close:
+                    connection.send(json.dumps(response))
+                connection.close()
+                return
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._thread.join()
+
+
+@pytest.fixture
+def replay_server():
+    """Start replay servers for a test, as `replay_server(on_audio, on_close)`, and stop them afterwards."""
+    servers = []
+
+    def start(on_audio, on_close):
+        servers.append(ReplayServer(on_audio, on_close))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
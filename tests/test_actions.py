@@ -0,0 +1,67 @@
+import socket
+import threading
+
+import pytest
+
+from echo_crafter.commander import actions as actions_module
+from echo_crafter.commander.actions import ActionExecutor
+
+
+@pytest.fixture
+def emacsclient_calls(monkeypatch):
+    calls = []
+
+    def run(arguments, **kwargs):
+        calls.append(arguments)
+        return actions_module.subprocess.CompletedProcess(arguments, 0, stdout="t\n", stderr="")
+
+    monkeypatch.setattr(actions_module.subprocess, 'run', run)
+    return calls
+
+
+def serve_once(path, answer):
+    """Accept one connection on a unix socket, read the request, then send `answer` unless it is None."""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen(1)
+    received = []
+
+    def handle():
+        conn, _ = server.accept()
+        with conn:
+            received.append(conn.recv(4096))
+            if answer is not None:
+                conn.sendall(answer)
+            else:
+                conn.recv(4096)
+        server.close()
+
+    thread = threading.Thread(target=handle, daemon=True)
+    thread.start()
+    return received
+
+
+def test_answer_is_read_from_the_socket(tmp_path, emacsclient_calls):
+    received = serve_once(tmp_path / 'server', b"-emacs-pid 1\n-print hello&_world\n")
+
+    result = ActionExecutor(emacs_socket=tmp_path / 'server', timeout=2).emacs('(message "hello world")')
+
+    assert result == (True, "hello world")
+    assert received == [b'-eval (message&_"hello&_world")\n']
+    assert emacsclient_calls == []
+
+
+def test_missing_server_falls_back_to_emacsclient(tmp_path, emacsclient_calls):
+    result = ActionExecutor(emacs_socket=tmp_path / 'server').emacs('(find-file "~")')
+
+    assert result.ok
+    assert emacsclient_calls == [["emacsclient", "-s", str(tmp_path / 'server'), "-e", '(find-file "~")']]
+
+
+def test_expression_is_not_resent_when_the_server_does_not_answer(tmp_path, emacsclient_calls):
+    serve_once(tmp_path / 'server', None)
+
+    result = ActionExecutor(emacs_socket=tmp_path / 'server', timeout=0.2).emacs('(find-file "~")')
+
+    assert not result.ok
+    assert emacsclient_calls == []
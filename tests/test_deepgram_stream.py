@@ -0,0 +1,42 @@
+import deepgram.clients.live.v1.client as live_client
+
+from echo_crafter.speech_processor.transcribe_deepgram_file import Deepgram
+
+
+def result(transcript, *, is_final, words=()):
+    return {
+        "type": "Results",
+        "channel_index": [0, 1],
+        "is_final": is_final,
+        "speech_final": is_final,
+        "channel": {"alternatives": [{
+            "transcript": transcript,
+            "confidence": 0.9,
+            "words": [{"word": word, "punctuated_word": word} for word in words],
+        }]},
+        "metadata": {"request_id": "replay", "model_info": {"name": "replay"}, "model_uuid": ""},
+    }
+
+
+def test_stream_reports_interim_and_final_transcripts(replay_server, monkeypatch):
+    # The keepalive thread of the live client only notices the end of the stream between pings.
+    monkeypatch.setattr(live_client, 'PING_INTERVAL', 0.05)
+    server = replay_server(
+        on_audio=[result("open", is_final=False), result("open the", is_final=False)],
+        on_close=[result("open the door", is_final=True, words=["open", "the", "door"]),
+                  result("", is_final=True)],
+    )
+    interims = []
+
+    stream = Deepgram(access_key="test", url=server.url).stream(on_interim=interims.append)
+    frames = [bytes(1024), [0] * 512, bytes(1024)]
+    for frame in frames:
+        stream.send(frame)
+    transcript, words = stream.finish()
+
+    assert server.path.startswith("/v1/listen?")
+    assert "encoding=linear16" in server.path and "interim_results=true" in server.path.lower()
+    assert [len(frame) for frame in server.received] == [1024, 1024, 1024]
+    assert interims == ["open", "open the"]
+    assert transcript == "open the door"
+    assert [word.word for word in words] == ["open", "the", "door"]
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip('pvrecorder')
+pytest.importorskip('pvcheetah')
+
+from echo_crafter.speech_processor.resources import EnginePool
+
+
+class FakeRecorder:
+    def __init__(self, frame_length):
+        self.frame_length = frame_length
+        self.is_recording = False
+
+    def delete(self):
+        pass
+
+
+def _make_fake_recorder(*, frame_length=512):
+    return FakeRecorder(frame_length)
+
+
+def test_omitted_arguments_share_instances_with_their_defaults(monkeypatch):
+    monkeypatch.setitem(EnginePool._FACTORIES, 'recorder', (_make_fake_recorder, None))
+    pool = EnginePool()
+
+    with pool.lease('recorder') as recorder:
+        pass
+    with pool.lease('recorder', frame_length=512) as same_recorder:
+        assert same_recorder is recorder
+    with pool.lease('recorder', frame_length=1024) as other_recorder:
+        assert other_recorder is not recorder
+    with pytest.raises(TypeError):
+        with pool.lease('recorder', frame_lenght=512):
+            pass
+    assert pool.stats() == {'recorder': {'idle': 2, 'leased': 0}}
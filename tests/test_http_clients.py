@@ -0,0 +1,55 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from echo_crafter.utils.http_clients import ClientRegistry
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answer GET requests, and HEAD ones with 405 like the provider APIs do."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def do_HEAD(self):
+        self.send_response(405)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    thread.join()
+
+
+def test_prewarm_is_not_counted_and_its_connection_is_reused(server_url):
+    registry = ClientRegistry()
+    registry.prewarm('deepgram', base_url=server_url)
+    deadline = time.monotonic() + 5
+    while registry.metrics().get('deepgram', {}).get('prewarms', 0) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    registry.http_client('deepgram').get(server_url)
+    metrics = registry.metrics()['deepgram']
+    registry.close()
+
+    assert metrics['prewarms'] == 1
+    assert (metrics['requests'], metrics['responses'], metrics['errors']) == (1, 1, 0)
+    assert (metrics['connections_opened'], metrics['connections_reused']) == (1, 1)
+    assert metrics['connections'] == 1
+    assert registry.metrics()['deepgram']['connections'] == 0
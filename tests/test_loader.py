@@ -0,0 +1,51 @@
+from echo_crafter.commander.controllers.loader import make_module_controller
+
+
+class FakeCapture:
+    """Hand out subscriptions and record which ones are still active."""
+
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self):
+        self.subscribers.append(object())
+        return self.subscribers[-1]
+
+    def unsubscribe(self, buffer):
+        self.subscribers.remove(buffer)
+
+
+def write_controller(tmp_path, source):
+    script = tmp_path / 'controller.py'
+    script.write_text(source)
+    script.chmod(0o755)
+    return script
+
+
+def test_controllers_reading_audio_get_a_subscription_to_the_capture(tmp_path):
+    script = write_controller(tmp_path, "def main(audio_source=None):\n    return audio_source\n")
+    capture = FakeCapture()
+
+    future = make_module_controller(script, capture=capture)()
+
+    assert future.result(timeout=5) is not None
+    assert capture.subscribers == []
+
+
+def test_subscription_is_dropped_when_the_controller_fails(tmp_path):
+    script = write_controller(tmp_path, "def main(audio_source=None):\n    raise RuntimeError('no audio')\n")
+    capture = FakeCapture()
+
+    future = make_module_controller(script, capture=capture)()
+
+    assert isinstance(future.exception(timeout=5), RuntimeError)
+    assert capture.subscribers == []
+
+
+def test_other_controllers_do_not_subscribe(tmp_path):
+    script = write_controller(tmp_path, "def execute(*, name):\n    return name\n")
+    capture = FakeCapture()
+
+    future = make_module_controller(script, capture=capture)(name='emacs')
+
+    assert future.result(timeout=5) == 'emacs'
@@ -0,0 +1,39 @@
+import json
+import logging
+
+from echo_crafter.logger import BatchWriter, NonBlockingQueueHandler, get_handler
+
+
+def make_record(msg):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, msg, None, None)
+
+
+def test_records_are_written_in_batches(tmp_path):
+    writer = BatchWriter(tmp_path / 'log.jsonl', flush_interval=0.01)
+    writer.start()
+    handler = NonBlockingQueueHandler(writer.queue)
+    for i in range(3):
+        handler.emit(make_record(f"record {i}"))
+    writer.stop()
+
+    lines = (tmp_path / 'log.jsonl').read_text().splitlines()
+    assert [json.loads(line)['msg'] for line in lines] == ["record 0", "record 1", "record 2"]
+
+
+def test_records_are_dropped_once_the_queue_is_full(tmp_path):
+    writer = BatchWriter(tmp_path / 'log.jsonl', max_pending=2)
+    handler = NonBlockingQueueHandler(writer.queue)
+    for i in range(5):
+        handler.emit(make_record(f"record {i}"))
+
+    assert writer.queue.qsize() == 2
+    assert handler.dropped == 3
+    writer.file.close()
+
+
+def test_unwritable_log_file_falls_back_to_stderr(tmp_path, capsys):
+    handler = get_handler(tmp_path / 'missing' / 'log.jsonl')
+
+    assert isinstance(handler, logging.StreamHandler)
+    handler.emit(make_record("to stderr"))
+    assert json.loads(capsys.readouterr().err.splitlines()[-1])['msg'] == "to stderr"
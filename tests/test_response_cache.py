@@ -0,0 +1,41 @@
+from conftest import load_module
+
+response_cache = load_module('response_cache', 'echo_crafter/prompts/response_cache.py')
+ResponseCache = response_cache.ResponseCache
+
+
+def test_lookups_do_not_rewrite_the_cache_file(tmp_path):
+    cache = ResponseCache(tmp_path / 'cache.json')
+    cache.put('ctx', 'list files', 'ls')
+    mtime = cache.path.stat().st_mtime_ns
+
+    assert cache.get('ctx', 'List files.') == 'ls'
+    assert cache.get('ctx', 'remove files') is None
+    assert cache.path.stat().st_mtime_ns == mtime
+    assert not cache.stats_path.exists()
+
+
+def test_close_adds_the_session_stats_to_the_saved_ones(tmp_path):
+    first = ResponseCache(tmp_path / 'cache.json')
+    second = ResponseCache(tmp_path / 'cache.json')
+    first.put('ctx', 'list files', 'ls')
+    first.get('ctx', 'list files')
+    second.get('ctx', 'list files')
+    first.close()
+    second.close()
+
+    stats = ResponseCache(tmp_path / 'cache.json').stats
+    assert stats['exact_hits'] == 1 and stats['misses'] == 1
+
+
+def test_failed_embeddings_fall_back_to_the_exact_tier(tmp_path):
+    def embed(request):
+        raise ConnectionError("no network")
+
+    cache = ResponseCache(tmp_path / 'cache.json', embed=embed)
+    cache.put('ctx', 'list files', 'ls')
+
+    assert cache.entries[next(iter(cache.entries))]['embedding'] is None
+    assert cache.get('ctx', 'list files') == 'ls'
+    assert cache.get('ctx', 'list all files') is None
+    assert cache.stats['exact_hits'] == 1 and cache.stats['misses'] == 1
@@ -0,0 +1,50 @@
+from threading import Thread
+
+import numpy as np
+import pytest
+
+from echo_crafter.speech_processor.utils.ring_buffer import AudioRingBuffer
+
+
+def test_frames_read_while_writing_are_never_torn():
+    frame_length, num_frames = 512, 2000
+    buffer = AudioRingBuffer(capacity=8 * frame_length, frame_length=frame_length)
+
+    def produce():
+        for i in range(num_frames):
+            buffer.put(np.full(frame_length, i % 30000, dtype=np.int16), block=True, timeout=5)
+
+    producer = Thread(target=produce)
+    producer.start()
+    values = []
+    for _ in range(num_frames):
+        frame = buffer.get(timeout=5)
+        assert (frame == frame[0]).all()
+        values.append(int(frame[0]))
+    producer.join()
+
+    assert values == [i % 30000 for i in range(num_frames)]
+
+
+def test_rewind_replays_the_marked_frames():
+    buffer = AudioRingBuffer(capacity=4 * 2, frame_length=2)
+    buffer.put([1, 1])
+    position = buffer.tell()
+    buffer.put([2, 2])
+    buffer.put([3, 3])
+    assert [int(buffer.get(timeout=0)[0]) for _ in range(3)] == [1, 2, 3]
+
+    buffer.rewind(position)
+    assert [int(buffer.get(timeout=0)[0]) for _ in range(3)] == [1, 2, 3]
+
+
+def test_rewind_past_overwritten_frames_raises_or_clamps():
+    buffer = AudioRingBuffer(capacity=4 * 2, frame_length=2)
+    position = buffer.mark()
+    for i in range(6):
+        buffer.put([i, i])
+
+    with pytest.raises(ValueError):
+        buffer.rewind(position)
+    assert buffer.rewind(position, clamp=True) == 2
+    assert [int(buffer.get(timeout=0)[0]) for _ in range(4)] == [2, 3, 4, 5]
@@ -0,0 +1,43 @@
+import pytest
+
+from echo_crafter.config import secret_store
+
+
+@pytest.fixture
+def password_store(monkeypatch):
+    calls = []
+
+    def get(provider, key):
+        calls.append((provider, key))
+        return 'secret'
+
+    monkeypatch.delenv('ECHO_CRAFTER_TEST_API_KEY', raising=False)
+    monkeypatch.setattr(secret_store, 'password_store_get', get)
+    return calls
+
+
+def test_secrets_are_cached_in_a_private_directory(tmp_path, monkeypatch, password_store):
+    cache_file = tmp_path / 'echo_crafter' / 'secrets.json'
+    monkeypatch.setattr(secret_store, 'get_cache_file', lambda: cache_file)
+
+    assert secret_store.get_secret('test', 'api_key') == 'secret'
+    assert secret_store.get_secret('test', 'api_key') == 'secret'
+    assert len(password_store) == 1
+    assert oct(cache_file.parent.stat().st_mode & 0o777) == oct(0o700)
+
+
+def test_a_directory_open_to_other_users_is_not_used(tmp_path, monkeypatch, password_store):
+    cache_dir = tmp_path / 'echo_crafter'
+    cache_dir.mkdir(mode=0o755)
+    cache_dir.chmod(0o755)
+    monkeypatch.setattr(secret_store, 'get_cache_file', lambda: cache_dir / 'secrets.json')
+
+    assert secret_store.get_secret('test', 'api_key') == 'secret'
+    assert not (cache_dir / 'secrets.json').exists()
+
+
+def test_a_cache_directory_which_cannot_be_created_is_skipped(tmp_path, monkeypatch, password_store):
+    (tmp_path / 'file').write_text('')
+    monkeypatch.setattr(secret_store, 'get_cache_file', lambda: tmp_path / 'file' / 'echo_crafter' / 'secrets.json')
+
+    assert secret_store.get_secret('test', 'api_key') == 'secret'
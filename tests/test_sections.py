@@ -0,0 +1,78 @@
+import pytest
+
+from conftest import load_module
+
+sections = load_module('sections', 'echo_crafter/prompts/sections.py')
+SectionParser, first_code_block, parse_sections = sections.SectionParser, sections.first_code_block, sections.parse_sections
+
+NAMES = ["CODE", "FILENAME", "DESCRIPTION"]
+
+ANSWER = """## CODE:
+````markdown
+# Usage
+```sh
+ls -la
+```
+````
+
+## FILENAME:
+README.md
+
+## DESCRIPTION:
+A readme with a usage example.
+"""
+
+
+def test_nested_fences_keep_their_content():
+    parser = SectionParser(NAMES)
+    parser.feed(ANSWER)
+    parser.close()
+
+    assert parser.code_blocks["CODE"] == ["# Usage\n```sh\nls -la\n```"]
+    assert parser.sections["FILENAME"] == "README.md"
+    assert parser.sections["DESCRIPTION"] == "A readme with a usage example."
+
+
+def test_unclosed_fence_does_not_hide_later_headers():
+    answer = "## CODE:\n```python\nprint(1)\n\n## FILENAME:\nhello.py\n\n## DESCRIPTION:\nPrints one.\n"
+
+    parser = SectionParser(NAMES)
+    parser.feed(answer)
+    parser.close()
+
+    assert parser.sections["CODE"] == "```python\nprint(1)"
+    assert parser.code_blocks["CODE"] == ["print(1)"]
+    assert parser.sections["FILENAME"] == "hello.py"
+    assert parser.sections["DESCRIPTION"] == "Prints one."
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+def test_chunk_boundaries_do_not_matter(chunk_size):
+    parser = SectionParser(NAMES)
+    closed = {}
+    for i in range(0, len(ANSWER), chunk_size):
+        closed.update(parser.feed(ANSWER[i:i + chunk_size]))
+    closed.update(parser.close())
+
+    assert closed == parser.sections == parse_sections(ANSWER, NAMES)
+    assert parser.code_blocks["CODE"] == ["# Usage\n```sh\nls -la\n```"]
+
+
+def test_partial_shows_the_open_section():
+    parser = SectionParser(NAMES)
+    parser.feed("## CODE:\n```sh\nls -la\n## FILE")
+
+    assert parser.partial()["CODE"] == "```sh\nls -la"
+
+
+@pytest.mark.parametrize("content, expected", [
+    ("Run this:\n```sh\nls -la\n```\nDone.", "ls -la"),
+    ("```python print(1)```", "print(1)"),
+    ("```ls```", "ls"),
+    ("```sh\nls -la```", "ls -la"),
+    ("````md\n```sh\nls\n```\n````", "```sh\nls\n```"),
+    ("```sh\nls -la\n", None),
+    ("No code here", None),
+])
+def test_first_code_block(content, expected):
+    assert first_code_block(content) == expected
@@ -0,0 +1,85 @@
+import asyncio
+
+import msgpack
+
+from conftest import load_module
+
+sessions = load_module('sessions', 'echo_crafter/prompts/sessions.py')
+
+
+class LegacyEndpoint:
+    """An endpoint only providing `read` and `write`, holding the data in memory."""
+
+    def __init__(self, data: bytes = b''):
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        return None
+
+    async def read(self) -> bytes:
+        return self.data
+
+    async def write(self, data: bytes) -> None:
+        self.data = data
+
+
+def messages(n, start=0):
+    return [{"role": "user", "content": str(i)} for i in range(start, start + n)]
+
+
+def test_first_save_without_load_replaces_the_file(tmp_path):
+    endpoint = sessions.FileEndpoint(tmp_path / 'session.msgpack')
+    endpoint.path.write_bytes(msgpack.packb(messages(3), use_bin_type=True))
+
+    manager = sessions.SessionManager()
+    manager.messages = messages(2, start=10)
+    asyncio.run(manager.save_messages(endpoint))
+
+    reloaded = sessions.SessionManager()
+    asyncio.run(reloaded.load_messages(endpoint))
+    assert reloaded.messages == messages(2, start=10)
+
+
+def test_windowed_load_reads_only_the_tail(tmp_path):
+    endpoint = sessions.FileEndpoint(tmp_path / 'session.msgpack')
+    manager = sessions.SessionManager()
+    asyncio.run(manager.load_messages(endpoint))
+    for i in range(5):
+        manager.messages.extend(messages(4, start=4 * i))
+        asyncio.run(manager.save_messages(endpoint))
+
+    data, num_skipped = asyncio.run(endpoint.read_tail(3))
+    assert num_skipped == 17
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(data)
+    assert list(unpacker) == messages(3, start=17)
+    windowed = sessions.SessionManager()
+    asyncio.run(windowed.load_messages(endpoint, last=3))
+    assert windowed.messages == messages(3, start=17)
+
+
+def test_windowed_load_falls_back_to_a_full_read_with_a_stale_index(tmp_path):
+    endpoint = sessions.FileEndpoint(tmp_path / 'session.msgpack')
+    manager = sessions.SessionManager()
+    manager.messages = messages(4)
+    asyncio.run(manager.save_messages(endpoint))
+    with open(endpoint.path, 'ab') as f:
+        f.write(msgpack.packb(messages(1, start=4)[0], use_bin_type=True))
+
+    assert asyncio.run(endpoint.read_tail(2)) is None
+    windowed = sessions.SessionManager()
+    asyncio.run(windowed.load_messages(endpoint, last=2))
+    assert windowed.messages == messages(2, start=3)
+
+
+def test_read_write_endpoints_get_a_single_packed_list():
+    endpoint = LegacyEndpoint(msgpack.packb(messages(2), use_bin_type=True))
+    manager = sessions.SessionManager()
+    asyncio.run(manager.load_messages(endpoint))
+    manager.messages.extend(messages(1, start=2))
+    asyncio.run(manager.save_messages(endpoint))
+
+    assert msgpack.unpackb(endpoint.data, raw=False) == messages(3)
@@ -0,0 +1,55 @@
+from typing import Tuple
+
+from echo_crafter.commander.volume import VolumeControl
+
+
+class FakeBackend:
+    """An in-memory stand-in for the sound server, recording the operations it receives."""
+
+    def __init__(self, volume: float = 0.5, mute: bool = False, persistent: bool = True):
+        self.volume = volume
+        self.muted = mute
+        self.persistent = persistent
+        self.operations = []
+
+    def get(self) -> Tuple[float, bool]:
+        self.operations.append(('get',))
+        return self.volume, self.muted
+
+    def set_volume(self, volume: float) -> None:
+        self.operations.append(('set_volume', volume))
+        self.volume = volume
+
+    def change_volume(self, delta: float) -> None:
+        self.operations.append(('change_volume', delta))
+        self.volume += delta
+
+    def set_mute(self, mute: bool) -> None:
+        self.operations.append(('set_mute', mute))
+        self.muted = mute
+
+
+def test_persistent_backend_ramps_and_reads_back():
+    backend = FakeBackend(volume=0.2)
+    control = VolumeControl(backend)
+
+    assert control.ramp(0.6, duration=0, num_steps=4) == 0.6
+    assert [op for op in backend.operations if op[0] == 'set_volume'][-1] == ('set_volume', 0.6)
+    assert len([op for op in backend.operations if op[0] == 'set_volume']) == 4
+    assert abs(control.step(0.05) - 0.65) < 1e-9
+
+
+def test_non_persistent_backend_issues_one_operation_per_change():
+    backend = FakeBackend(volume=0.2, persistent=False)
+    control = VolumeControl(backend)
+
+    assert control.ramp(0.6) is None
+    assert control.step(-0.1) is None
+    assert control.set(2.0) is None
+    assert control.mute(True) is True
+    assert backend.operations == [
+        ('set_volume', 0.6),
+        ('change_volume', -0.1),
+        ('set_volume', 1.5),
+        ('set_mute', True),
+    ]
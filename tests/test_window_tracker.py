@@ -0,0 +1,47 @@
+import time
+from threading import Event
+
+from echo_crafter.commander.window_tracker import WindowTracker
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_failed_source_is_restarted_and_the_fallback_serves_meanwhile():
+    calls = []
+    release = Event()
+
+    def source():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise OSError("xprop is not running")
+        yield 'Emacs'
+        release.wait()
+
+    tracker = WindowTracker(source, fallback=lambda: 'fallback', restart_delay=0.05)
+    assert tracker.active_window() == 'fallback'
+    assert wait_for(lambda: tracker.active_window() == 'Emacs')
+    assert len(calls) == 2 and calls[1] - calls[0] >= 0.05
+
+    tracker.stop()
+    release.set()
+
+
+def test_restart_delay_doubles_up_to_the_maximum():
+    calls = []
+
+    def source():
+        calls.append(time.monotonic())
+        return []
+
+    tracker = WindowTracker(source, fallback=lambda: 'fallback', restart_delay=0.02, max_restart_delay=0.04)
+    tracker.start()
+    assert wait_for(lambda: len(calls) >= 4)
+    tracker.stop()
+
+    delays = [b - a for a, b in zip(calls, calls[1:])]
+    assert delays[0] >= 0.02 and delays[1] >= 0.04 and delays[2] < 0.08